@@ -0,0 +1,145 @@
+"""
+Compare sorting a large, densely linked set of tasks by roi with a graph of
+GraphNode objects holding python lists against the array backed
+DependencyGraph. NumPy is used to build the graph when installed.
+
+    python benchmarks/dependency_graph.py [number of tasks] [dependencies per task]
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import heapq
+import random
+import sys
+import timeit
+import tracemalloc
+from typing import Callable, Dict, List
+
+from tsktsk import dependencies
+from tsktsk.task import Effort, Task, Value
+
+
+@dataclasses.dataclass
+class GraphNode:
+    task: Task
+    dependencies: List[GraphNode]
+    dependents: List[GraphNode]
+
+
+def reference_build_graph(tasks: Dict[str, Task]) -> List[GraphNode]:
+    nodes = {}
+
+    def get_node(task):
+        node = nodes.get(task.key)
+        if not node:
+            node = nodes[task.key] = GraphNode(task, [], [])
+        return node
+
+    for node in map(get_node, tasks.values()):
+        for dep in node.task.dependencies:
+            try:
+                dependency_node = get_node(tasks[dep])
+            except KeyError:
+                continue
+            node.dependencies.append(dependency_node)
+            dependency_node.dependents.append(node)
+
+    return list(nodes.values())
+
+
+def reference_sort(repo: List[Task]) -> List[Task]:
+    nodes = reference_build_graph({task.key: task for task in repo})
+
+    remaining = {id(node): len(node.dependencies) for node in nodes}
+    order = [node for node in nodes if not node.dependencies]
+    for node in order:
+        for dependent in node.dependents:
+            remaining[id(dependent)] -= 1
+            if not remaining[id(dependent)]:
+                order.append(dependent)
+
+    values: Dict[int, float] = {}
+    efforts: Dict[int, float] = {}
+    roi: Dict[int, float] = {}
+    for node in reversed(order):
+        task = node.task
+        value, effort = float(task.value_points), float(task.effort_points)
+        for dependent in node.dependents:
+            if id(dependent) in values:
+                share = len(dependent.dependencies)
+                value += values[id(dependent)] / share
+                effort += efforts[id(dependent)] / share
+        values[id(node)], efforts[id(node)] = value, effort
+        roi[id(node)] = max(value / effort, task.value_points / task.effort_points)
+
+    sort_key = lambda node: (-roi[id(node)], node.task.key)
+    available = [(sort_key(node), node) for node in nodes if not node.dependencies]
+    heapq.heapify(available)
+
+    remaining = {id(node): len(node.dependencies) for node in nodes}
+    output = []
+    while available:
+        _, node = heapq.heappop(available)
+        output.append(node.task)
+        for dependent in node.dependents:
+            remaining[id(dependent)] -= 1
+            if not remaining[id(dependent)]:
+                heapq.heappush(available, (sort_key(dependent), dependent))
+
+    listed = {id(node) for node in order}
+    output.extend(
+        node.task
+        for node in sorted(nodes, key=lambda node: node.task.key)
+        if id(node) not in listed
+    )
+    return output
+
+
+def generate(count: int, links: int) -> List[Task]:
+    rng = random.Random(0)
+    values, efforts = list(Value), list(Effort)
+    return [
+        Task(
+            key=str(i),
+            message=f"Task number {i}",
+            value=rng.choice(values),
+            effort=rng.choice(efforts),
+            dependencies={str(rng.randint(1, i - 1)) for _ in range(links)}
+            if i > 1
+            else (),
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def measure(sort: Callable, tasks: List[Task]) -> int:
+    tracemalloc.start()
+    sort(tasks)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main(count: int, links: int) -> None:
+    tasks = generate(count, links)
+    assert reference_sort(tasks) == dependencies.sort_tasks_by_roi(tasks)
+
+    engine = "numpy" if dependencies.numpy else "python"
+    for name, sort in (
+        ("reference", reference_sort),
+        (engine, dependencies.sort_tasks_by_roi),
+    ):
+        elapsed = min(timeit.repeat(lambda: sort(tasks), number=1, repeat=3))
+        peak = measure(sort, tasks)
+        print(
+            f"{name:>10}: {elapsed:.3f}s, {peak / 2**20:.1f}MiB peak"
+            f" for {count} tasks with {links} dependencies each"
+        )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10,
+    )
@@ -0,0 +1,98 @@
+"""
+Compare loading a large .tsktsk file with the pure python yaml loader and
+decoder against the libyaml loader and table based decoder, and looking up
+a single task by reading everything against using the index.
+
+    python benchmarks/file_repository.py [number of tasks]
+"""
+
+import sys
+import tempfile
+import timeit
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import yaml
+
+from tsktsk.repository.file import (
+    Dumper,
+    FileRepository,
+    Loader,
+    task_from_yaml,
+    task_to_yaml,
+)
+from tsktsk.task import Category, Effort, Task, Value
+
+
+def generate(count: int):
+    categories, values, efforts = list(Category), list(Value), list(Effort)
+    tasks = {}
+    for i in range(1, count + 1):
+        task = Task(
+            key=str(i),
+            message=f"Task number {i}",
+            category=categories[i % len(categories)],
+            value=values[i % len(values)],
+            effort=efforts[i % len(efforts)],
+            dependencies={str(d) for d in range(max(1, i - 2), i)},
+            done=date(2020, 1, 1) + timedelta(days=i % 700) if i % 3 else None,
+        )
+        tasks[task.key] = task_to_yaml(task)
+    return tasks
+
+
+def reference_task_from_yaml(values):
+    values = dict(values)
+    for name, enum_type in (
+        ("category", Category),
+        ("value", Value),
+        ("effort", Effort),
+    ):
+        if values.get(name):
+            values[name] = enum_type.__members__[values[name].upper()]
+    if values.get("done"):
+        values["done"] = datetime.strptime(values["done"], "%Y%m%d").date()
+    values["dependencies"] = set(values.get("dependencies", []))
+    return Task(**values)
+
+
+def main(count: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp, ".tsktsk")
+        with path.open("w") as f:
+            yaml.dump(generate(count), f, Dumper=Dumper)
+
+        def reference():
+            with path.open() as f:
+                tasks = yaml.safe_load(f)
+            return [reference_task_from_yaml(t) for t in tasks.values()]
+
+        def fast():
+            with path.open() as f:
+                tasks = yaml.load(f, Loader=Loader)
+            return [task_from_yaml(t) for t in tasks.values()]
+
+        assert reference() == fast()
+
+        for name, f in (("reference", reference), ("fast", fast)):
+            best = min(timeit.repeat(f, number=1, repeat=3))
+            print(f"{name:>10}: {best:.3f}s for {count} tasks")
+
+        repo = FileRepository(path)
+        key = str(count // 2)
+
+        def read():
+            return repo.read()[key]
+
+        def find():
+            return repo.find(key)
+
+        assert read() == find()
+
+        for name, f in (("read", read), ("find", find)):
+            best = min(timeit.repeat(f, number=1, repeat=3))
+            print(f"{name:>10}: {best:.3f}s for task {key}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 40000)
@@ -0,0 +1,146 @@
+"""
+Compare decoding pages of github issues into tasks the way it was done
+before, per issue with strptime and label tuples rebuilt for every label,
+against decoding the bytes of each page with tasks_from_page.
+
+    python benchmarks/github_decode.py [issues.json | number of issues]
+
+A dump of issues, as a json list such as one recorded with
+curl "https://api.github.com/repos/OWNER/REPO/issues?state=all&per_page=100",
+is used when given, otherwise a similar one is generated.
+"""
+
+import json
+import sys
+import timeit
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from tsktsk.repository.github import (
+    DEPENDENCIES_HEADER,
+    PER_PAGE,
+    GithubTask,
+    local_tz,
+    tasks_from_page,
+)
+from tsktsk.task import Category, Effort, Value
+
+JsonObject = Dict[str, Any]
+
+
+def reference_date_from_str(value: str) -> date:
+    return (
+        datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ")
+        .replace(tzinfo=timezone.utc)
+        .astimezone(local_tz)
+        .date()
+    )
+
+
+def reference_task_from_json(issue: JsonObject) -> GithubTask:
+    title = issue["title"]
+
+    category = None
+
+    if ":" in title:
+        prefix, message = title.split(":", maxsplit=1)
+        category = next((c for c in Category if c.name in prefix), None)
+
+    if not category:
+        category = Category.DEFAULT
+        message = title
+
+    labels = sorted(label["name"] for label in issue["labels"])
+
+    value = next((v for v in Value if v.value in labels), Value.DEFAULT)
+    effort = next((e for e in Effort if e.value in labels), Effort.DEFAULT)
+    additional_labels = sorted(
+        l
+        for l in labels
+        if l not in (v.value for v in Value) and l not in (e.value for e in Effort)
+    )
+
+    done = issue["closed_at"]
+    if done:
+        done = reference_date_from_str(done)
+
+    body = issue["body"] or ""
+    if body.startswith(DEPENDENCIES_HEADER):
+        deps, _, body = body.partition("\n")
+        dependencies = set(
+            dep.lstrip("#") for dep in deps.lstrip(DEPENDENCIES_HEADER).split(", ")
+        )
+    else:
+        dependencies = set()
+
+    return GithubTask(
+        key=str(issue["number"]),
+        message=message.strip(),
+        category=category,
+        effort=effort,
+        value=value,
+        additional_labels=additional_labels,
+        dependencies=dependencies,
+        additional_body=body,
+        done=done,
+    )
+
+
+def generate(count: int) -> List[JsonObject]:
+    categories, values, efforts = list(Category), list(Value), list(Effort)
+    start = datetime(2020, 1, 1)
+    issues = []
+    for i in range(1, count + 1):
+        labels = [values[i % 3].value, efforts[i % 5 % 3].value, "bug", "help wanted"]
+        closed = start + timedelta(minutes=37 * i) if i % 3 else None
+        deps = ", ".join(f"#{d}" for d in range(max(1, i - 2), i))
+        issues.append(
+            {
+                "number": i,
+                "title": f"{categories[i % len(categories)].value}: Issue number {i}",
+                "labels": [{"name": name} for name in labels if name],
+                "state": "closed" if closed else "open",
+                "closed_at": closed.strftime("%Y-%m-%dT%H:%M:%SZ") if closed else None,
+                "body": f"{DEPENDENCIES_HEADER}{deps}\nSome more text" if deps else "",
+            }
+        )
+    return issues
+
+
+def paginate(issues: List[JsonObject]) -> List[bytes]:
+    return [
+        json.dumps(issues[start : start + PER_PAGE]).encode("utf-8")
+        for start in range(0, len(issues), PER_PAGE)
+    ]
+
+
+def reference(pages: List[bytes]) -> List[GithubTask]:
+    return [
+        reference_task_from_json(issue)
+        for page in pages
+        for issue in json.loads(page.decode("utf-8"))
+        if not issue.get("pull_request")
+    ]
+
+
+def bulk(pages: List[bytes]) -> List[GithubTask]:
+    return [task for page in pages for task in tasks_from_page(page)]
+
+
+def main(source: str) -> None:
+    if source.isdigit():
+        issues = generate(int(source))
+    else:
+        with open(source, mode="r") as f:
+            issues = json.load(f)
+
+    pages = paginate(issues)
+    assert reference(pages) == bulk(pages)
+
+    for name, decode in (("reference", reference), ("bulk", bulk)):
+        elapsed = min(timeit.repeat(lambda: decode(pages), number=1, repeat=5))
+        print(f"{name:>10}: {elapsed:.3f}s for {len(issues)} issues")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "10000")
@@ -0,0 +1,60 @@
+"""
+Compare the memory used by a large number of tasks held as plain dataclass
+instances with set dependencies against the slotted Task.
+
+    python benchmarks/task_memory.py [number of tasks]
+"""
+
+import dataclasses
+import sys
+import tracemalloc
+from datetime import date, timedelta
+from typing import Callable, List, Optional, Set
+
+from tsktsk.task import Category, Effort, Task, Value
+
+
+@dataclasses.dataclass
+class ReferenceTask:
+    key: str
+    message: str
+    category: Category = Category.DEFAULT
+    value: Value = Value.DEFAULT
+    effort: Effort = Effort.DEFAULT
+    dependencies: Set[str] = dataclasses.field(default_factory=set)
+    done: Optional[date] = None
+
+
+def generate(task_type: Callable, count: int) -> List:
+    categories, values, efforts = list(Category), list(Value), list(Effort)
+    return [
+        task_type(
+            key=str(i),
+            message=f"Task number {i}",
+            category=categories[i % len(categories)],
+            value=values[i % len(values)],
+            effort=efforts[i % len(efforts)],
+            dependencies={str(d) for d in range(max(1, i - 2), i)},
+            done=date(2020, 1, 1) + timedelta(days=i % 700) if i % 3 else None,
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def measure(task_type: Callable, count: int) -> int:
+    tracemalloc.start()
+    tasks = generate(task_type, count)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tasks
+    return size
+
+
+def main(count: int) -> None:
+    for name, task_type in (("reference", ReferenceTask), ("slotted", Task)):
+        size = measure(task_type, count)
+        print(f"{name:>10}: {size / 2**20:.1f}MiB for {count} tasks")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
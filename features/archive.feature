@@ -0,0 +1,79 @@
+Feature: Archive
+
+  Scenario: when archiving done tasks
+    Given I have run tsktsk init
+      And I have run tsktsk new First Task
+      And I have run tsktsk new Second Task
+      And I have run tsktsk done 1
+     When I run tsktsk archive
+     Then its exit code should be 0
+      And its stderr should be
+        """
+        Archived 1 task(s).
+
+        """
+      And the file .tsktsk.archive/manifest.yaml should exist
+     When I run tsktsk list
+     Then its stdout should be
+        """
+             2 📦 NEW: Second Task
+
+        """
+
+  Scenario: when adding a task after archiving
+    Given I have run tsktsk init
+      And I have run tsktsk new First Task
+      And I have run tsktsk done 1
+      And I have run tsktsk archive
+     When I run tsktsk new Second Task
+     Then its stdout should be
+        """
+             2 📦 NEW: Second Task
+
+        """
+
+  Scenario: when marking an archived task as undone
+    Given I have run tsktsk init --storage=sharded
+      And I have run tsktsk new First Task
+      And I have run tsktsk new Second Task
+      And I have run tsktsk done 1
+      And I have run tsktsk archive
+     When I run tsktsk undone 1
+     Then its exit code should be 0
+     When I run tsktsk list
+     Then its stdout should be
+        """
+             1 📦 NEW: First Task
+             2 📦 NEW: Second Task
+
+        """
+
+  Scenario: when archiving in sqlite storage
+    Given I have run tsktsk init --storage=sqlite
+     When I run tsktsk archive
+     Then its exit code should be 1
+      And its stderr should be
+        """
+        Archiving is not supported by this repository.
+
+        """
+
+  Scenario: when depending on an archived task
+    Given I have run tsktsk init
+      And I have run tsktsk new First Task
+      And I have run tsktsk new Second Task
+      And I have run tsktsk done 1
+      And I have run tsktsk archive
+     When I run tsktsk new --dep 1 Third Task
+     Then its exit code should be 0
+     When I run tsktsk edit 2 --dep 1
+     Then its exit code should be 0
+     When I run tsktsk list
+     Then its stdout should be
+        """
+             2 📦 NEW: Second Task
+                  🔗 1
+             3 📦 NEW: Third Task
+                  🔗 1
+
+        """
@@ -32,3 +32,14 @@ Feature: Commit
              1 📦 NEW: First Task
 
         """
+
+  Scenario: when committing a nonexistent task
+    Given I have a git repository
+      And I have run tsktsk init
+     When I run tsktsk commit 1
+     Then its exit code should be 1
+      And its stderr should be
+        """
+        Nonexistent task
+
+        """
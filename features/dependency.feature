@@ -45,6 +45,19 @@ Feature: Task Dependency
 
         """
 
+  Scenario: when adding a dependency that closes a longer cycle
+    Given I have run tsktsk init
+      And I have run tsktsk new First Task
+      And I have run tsktsk new --dep 1 Second Task
+      And I have run tsktsk new --dep 2 Third Task
+     When I run tsktsk edit 1 --dep 3
+     Then its exit code should be 1
+      And its stderr should be
+        """
+        Circular dependencies are not allowed
+
+        """
+
   Scenario: when adding or removing nonexistent tasks as dependencies
     Given I have run tsktsk init
       And I have run tsktsk new First Task
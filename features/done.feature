@@ -21,3 +21,58 @@ Feature: Done
         """
      When I run tsktsk list
      Then its stdout should be empty
+
+  Scenario: when marking several tasks done
+    Given I have run tsktsk init
+      And I have run tsktsk new First Task
+      And I have run tsktsk new Second Task
+      And I have run tsktsk new Third Task
+     When I run tsktsk done 1 3
+     Then its exit code should be 0
+      And its stdout should be
+        """
+             1 📦 NEW: First Task
+             3 📦 NEW: Third Task
+
+        """
+     When I run tsktsk list
+     Then its stdout should be
+        """
+             2 📦 NEW: Second Task
+
+        """
+
+  Scenario: when marking several tasks done and some cannot be
+    Given I have run tsktsk init
+      And I have run tsktsk new First Task
+      And I have run tsktsk new Second Task
+      And I have run tsktsk new Third Task
+      And I have run tsktsk done 2
+     When I run tsktsk done 1 2 5 3
+     Then its exit code should be 1
+      And its stderr should be
+        """
+        Marked as done:
+        Nonexistent task(s): 5
+        2: Task is already done
+
+        """
+     When I run tsktsk list
+     Then its stdout should be empty
+
+  Scenario: when marking the same task done more than once
+    Given I have run tsktsk init
+      And I have run tsktsk new First Task
+     When I run tsktsk done 1 1 5 5
+     Then its exit code should be 1
+      And its stdout should be
+        """
+             1 📦 NEW: First Task
+
+        """
+      And its stderr should be
+        """
+        Marked as done:
+        Nonexistent task(s): 5
+
+        """
@@ -26,3 +26,19 @@ Feature: Edit
         """
 
 
+
+  Scenario: when editing several tasks
+    Given I have run tsktsk init
+      And I have run tsktsk new Dependency
+      And I have run tsktsk new A Task
+      And I have run tsktsk new Another Task
+     When I run tsktsk edit 2,3 --value=high --dep 1
+     Then its exit code should be 0
+      And its stdout should be
+        """
+             2 📦 NEW: A Task                                             V⬆
+                  🔗 1
+             3 📦 NEW: Another Task                                       V⬆
+                  🔗 1
+
+        """
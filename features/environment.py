@@ -1,3 +1,4 @@
+import os
 import shutil
 import tempfile
 from unittest.mock import patch
@@ -20,7 +21,11 @@ def before_tag(context, tag):
 
 def before_scenario(context, scenario):
     context.working_directory = tempfile.mkdtemp()
+    context.cache_directory = tempfile.mkdtemp()
+    os.environ["TSKTSK_CACHE_PATH"] = context.cache_directory
 
 
 def after_scenario(context, scenario):
     shutil.rmtree(context.working_directory)
+    shutil.rmtree(context.cache_directory)
+    del os.environ["TSKTSK_CACHE_PATH"]
@@ -13,17 +13,21 @@ Feature: Help
          --help         Show this message and exit.
 
        Commands:
-         commit  Commit changes using message from task.
-         doc     Create a task to improve documentation.
-         done    Mark a task as done.
-         edit    Edit an existing task.
-         fix     Create a task to fix a bug.
-         imp     Create a task to improve something existing.
-         init    Initialize a new tsktsk repository.
-         list    List tasks to be done, with highest value:effort ratio first.
-         new     Create a task to add something new.
-         tst     Create a task related to testing.
-         undone  Mark a task as undone.
+         archive  Move done tasks out of the task list, to speed up listing.
+         commit   Commit changes using message from task.
+         doc      Create a task to improve documentation.
+         done     Mark tasks as done.
+         edit     Edit existing tasks.
+         export   Write every task to FILE, or stdout, as JSON lines.
+         fix      Create a task to fix a bug.
+         imp      Create a task to improve something existing.
+         import   Add the tasks exported to FILE.
+         init     Initialize a new tsktsk repository.
+         list     List tasks to be done, with highest value:effort ratio first.
+         migrate  Move tasks in a .tsktsk file to another storage.
+         new      Create a task to add something new.
+         tst      Create a task related to testing.
+         undone   Mark tasks as undone.
 
        """
 
@@ -56,9 +60,9 @@ Feature: Help
       Then its exit code should be 0
        And its stdout should be
          """
-         Usage: tsktsk done [OPTIONS] KEY
+         Usage: tsktsk done [OPTIONS] KEYS...
 
-           Mark a task as done. KEY specifies which task.
+           Mark tasks as done. KEYS specifies which tasks.
 
          Options:
            --help  Show this message and exit.
@@ -70,9 +74,9 @@ Feature: Help
       Then its exit code should be 0
        And its stdout should be
          """
-         Usage: tsktsk undone [OPTIONS] KEY
+         Usage: tsktsk undone [OPTIONS] KEYS...
 
-           Mark a task as undone. KEY specifies which task.
+           Mark tasks as undone. KEYS specifies which tasks.
 
          Options:
            --help  Show this message and exit.
@@ -86,7 +90,8 @@ Feature: Help
          """
          Usage: tsktsk edit [OPTIONS] KEY [MESSAGE]...
         
-           Edit an existing task. KEY specifies which task.
+           Edit existing tasks. KEY specifies which task, or several separated by
+           commas.
 
          Options:
            --category [new|imp|fix|doc|tst]
@@ -109,7 +114,9 @@ Feature: Help
            Initialize a new tsktsk repository.
 
          Options:
-           --help  Show this message and exit.
+           --storage [file|journal|sqlite|sharded]
+                                           How tasks are stored.
+           --help                          Show this message and exit.
 
          """
 
@@ -124,10 +131,28 @@ Feature: Help
 
          Options:
            --estimates / --no-estimates  Show completion date estimates.
+           --limit INTEGER               Show at most this many tasks.
+           --offset INTEGER              Skip this many tasks first.
            --help                        Show this message and exit.
 
          """
 
+    Scenario: Help for migrate command
+      When I run tsktsk migrate --help
+      Then its exit code should be 0
+       And its stdout should be
+         """
+         Usage: tsktsk migrate [OPTIONS]
+
+           Move tasks in a .tsktsk file to another storage.
+
+         Options:
+           --storage [file|journal|sqlite|sharded]
+                                           How tasks should be stored.  [required]
+           --help                          Show this message and exit.
+
+         """
+
     Scenario: Help for commit command
       When I run tsktsk commit --help
       Then its exit code should be 0
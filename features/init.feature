@@ -10,6 +10,84 @@ Feature: Initialize
       """
      And the file .tsktsk should exist
 
+  Scenario: when initializing tsktsk with a journal
+    When I run tsktsk init --storage=journal
+    Then its exit code should be 0
+     And the file .tsktsk should exist
+     And the file .tsktsk.journal should exist
+
+  Scenario: when using a journal
+    Given I have run tsktsk init --storage=journal
+      And I have run tsktsk new First Task
+      And I have run tsktsk new Second Task
+      And I have run tsktsk done 1
+     When I run tsktsk list
+     Then its exit code should be 0
+      And its stdout should be
+        """
+             2 📦 NEW: Second Task
+
+        """
+
+  Scenario: when initializing tsktsk with sqlite
+    When I run tsktsk init --storage=sqlite
+    Then its exit code should be 0
+     And the file .tsktsk.sqlite should exist
+
+  Scenario: when migrating to sqlite
+    Given I have run tsktsk init
+      And I have run tsktsk new First Task
+      And I have run tsktsk new --dep 1 Second Task
+      And I have run tsktsk new Third Task
+      And I have run tsktsk done 3
+     When I run tsktsk migrate --storage=sqlite
+     Then its exit code should be 0
+      And the file .tsktsk.sqlite should exist
+      And the file .tsktsk.bak should exist
+     When I run tsktsk list
+     Then its stdout should be
+        """
+             1 📦 NEW: First Task
+             2 📦 NEW: Second Task
+                  🔗 1
+
+        """
+
+  Scenario: when initializing tsktsk with sharded storage
+    When I run tsktsk init --storage=sharded
+    Then its exit code should be 0
+     And the file .tsktsk/manifest.yaml should exist
+
+  Scenario: when migrating to sharded storage
+    Given I have run tsktsk init
+      And I have run tsktsk new First Task
+      And I have run tsktsk new --dep 1 Second Task
+      And I have run tsktsk new Third Task
+      And I have run tsktsk done 3
+     When I run tsktsk migrate --storage=sharded
+     Then its exit code should be 0
+      And the file .tsktsk/manifest.yaml should exist
+      And the file .tsktsk.bak should exist
+     When I run tsktsk new Fourth Task
+      And I run tsktsk list
+     Then its stdout should be
+        """
+             1 📦 NEW: First Task
+             2 📦 NEW: Second Task
+                  🔗 1
+             4 📦 NEW: Fourth Task
+
+        """
+
+  Scenario: when migrating without a .tsktsk file
+    When I run tsktsk migrate --storage=sqlite
+    Then its exit code should be 1
+     And its stderr should be
+      """
+      No .tsktsk file to migrate.
+
+      """
+
   Scenario: when tsktsk already initialized
     Given I have run tsktsk init
     When I run tsktsk init
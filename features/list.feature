@@ -80,6 +80,42 @@ Feature: List
 
         """
 
+  Scenario: shows only some tasks with limit and offset
+    Given I have run tsktsk init
+      And I have run tsktsk new --value=high First Task
+      And I have run tsktsk new --effort=low Second Task
+      And I have run tsktsk new --effort=low --value=high Third Task
+     When I run tsktsk list --limit 1
+     Then its exit code should be 0
+      And its stdout should be
+        """
+             3 📦 NEW: Third Task                                         V⬆ E⬇
+
+        """
+     When I run tsktsk list --offset 1 --limit 1
+     Then its stdout should be
+        """
+             2 📦 NEW: Second Task                                           E⬇
+
+        """
+     When I run tsktsk list --offset 3
+     Then its exit code should be 0
+      And its stdout should be empty
+      And its stderr should be empty
+     When I run tsktsk list --limit 0
+     Then its stdout should be empty
+      And its stderr should be empty
+
+  Scenario: when limit is negative
+    Given I have run tsktsk init
+     When I run tsktsk list --limit -1
+     Then its exit code should be 1
+      And its stderr should be
+        """
+        Limit and offset cannot be negative
+
+        """
+
   Scenario: when tasks list is empty
     Given I have run tsktsk init
      When I run tsktsk list
@@ -0,0 +1,44 @@
+Feature: Import and export
+
+  Scenario: when exporting tasks
+    Given I have run tsktsk init
+      And I have run tsktsk new First Task
+      And I have run tsktsk fix --value=high --dep=1 Second Task
+     When I run tsktsk export
+     Then its exit code should be 0
+      And its stdout should be
+        """
+        {"key": "1", "message": "First Task", "category": "new", "value": "medium", "effort": "medium", "dependencies": [], "done": null}
+        {"key": "2", "message": "Second Task", "category": "fix", "value": "high", "effort": "medium", "dependencies": ["1"], "done": null}
+
+        """
+      And its stderr should be
+        """
+        Exported 2 task(s).
+
+        """
+
+  Scenario: when importing into another repository
+    Given I have run tsktsk init
+      And I have run tsktsk new First Task
+      And I have run tsktsk fix --dep=1 Second Task
+      And I have run tsktsk export tasks.jsonl
+      And I have run rm .tsktsk
+      And I have run tsktsk init --storage=sqlite
+      And I have run tsktsk new Existing Task
+     When I run tsktsk import tasks.jsonl
+     Then its exit code should be 0
+      And its stderr should be
+        """
+        Imported 2 task(s).
+
+        """
+     When I run tsktsk list
+     Then its stdout should be
+        """
+             1 📦 NEW: Existing Task
+             2 📦 NEW: First Task
+             3 🐛 FIX: Second Task
+                  🔗 2
+
+        """
@@ -58,6 +58,22 @@ Feature: Velocity
     # 60 days between start_date and current date
     | 2020-07-05 |  high  |   10-10   |   16-11   |
 
+  Scenario: estimates count the tasks skipped by offset
+    Given today is 2020-09-01
+      And I have run tsktsk init
+      And I have run tsktsk new First Task
+      And I have run tsktsk new Second Task
+      And I have run tsktsk new Third Task
+      And I have run tsktsk done 1
+    Given today is 2020-09-03
+     When I run tsktsk list --estimates --offset 1
+     Then its exit code should be 0
+      And its stdout should be
+        """
+             3 📦 NEW: Third Task                                               ⏰ 06-09
+
+        """
+
   Scenario Outline: velocity from several days
     Given I have run tsktsk init
       And I have run tsktsk new --effort=<effort1> First Task
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cache_path(tmp_path_factory, monkeypatch):
+    # keep caches, including those of local repositories, out of the home folder
+    monkeypatch.setenv("TSKTSK_CACHE_PATH", str(tmp_path_factory.mktemp("cache")))
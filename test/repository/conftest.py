@@ -0,0 +1,256 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import pytest
+
+
+class FakeGithub:
+    """
+    Just enough of the github issues api, rest and graphql, to test
+    GithubRepository against.
+    """
+
+    url: str
+
+    def __init__(self):
+        self.issues: Dict[int, Dict[str, Any]] = {}
+        self.requests: List[str] = []
+        self.clock = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+        self.remaining = 5000
+        self.rate_limited = 0
+        self.search_limit = 1000
+        self.before_get: Optional[Callable[[str], None]] = None
+        self.lock = threading.Lock()
+
+    def now(self) -> str:
+        self.clock += timedelta(seconds=1)
+        return self.clock.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def add_issue(self, title: str, **kwargs: Any) -> Dict[str, Any]:
+        with self.lock:
+            number = len(self.issues) + 1
+            self.issues[number] = {
+                "number": number,
+                "title": title,
+                "labels": [],
+                "state": "open",
+                "closed_at": None,
+                "updated_at": self.now(),
+                "body": "",
+                **kwargs,
+            }
+            return self.issues[number]
+
+    def update_issue(self, number: int, **kwargs: Any) -> Dict[str, Any]:
+        issue = self.issues[number]
+        issue.update(kwargs, updated_at=self.now())
+        if "state" in kwargs:
+            issue["closed_at"] = (
+                issue["updated_at"] if issue["state"] == "closed" else None
+            )
+        return issue
+
+
+def parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def search(github: FakeGithub, q: str) -> List[Dict[str, Any]]:
+    """
+    Supports only the query used for closed issues, e.g.
+    repo:owner/repo is:issue closed:2020-01-01T00:00:00+00:00..2020-03-01T23:59:59+00:00
+    """
+    closed = re.search(r"closed:(\S+)\.\.(\S+)", q)
+    start, end = parse_time(closed.group(1)), parse_time(closed.group(2))
+    return [
+        i
+        for i in github.issues.values()
+        if i["closed_at"] and start <= parse_time(i["closed_at"]) <= end
+    ]
+
+
+def handler(github: FakeGithub):
+    class Handler(BaseHTTPRequestHandler):
+        # keep connections open, as github does
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def date_time_string(self, timestamp=None):
+            return format_datetime(github.clock.replace(tzinfo=timezone.utc), True)
+
+        def send_json(self, body, status=200, headers=()):
+            data = json.dumps(body).encode("utf-8")
+            etag = f'"{hashlib.sha1(data).hexdigest()}"'
+            if status == 200 and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+
+            self.send_response(status)
+            self.send_rate_limit()
+            self.send_header("ETag", etag)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for header in headers:
+                self.send_header(*header)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def send_rate_limit(self):
+            github.remaining -= 1
+            self.send_header("X-RateLimit-Limit", "5000")
+            self.send_header("X-RateLimit-Remaining", str(github.remaining))
+            self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+
+        def reject(self):
+            """
+            Refuse the request as a secondary rate limit would, if asked to.
+            """
+            if not github.rate_limited:
+                return False
+
+            github.rate_limited -= 1
+            data = b'{"message": "You have exceeded a secondary rate limit."}'
+            self.send_response(403)
+            self.send_rate_limit()
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return True
+
+        def do_GET(self):
+            github.requests.append(f"GET {self.path}")
+            if github.before_get:
+                github.before_get(self.path)
+            if self.reject():
+                return
+            url = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+            if url.path == "/search/issues":
+                found = search(github, query["q"])
+                return self.send_page(
+                    url, query, found[: github.search_limit], "items", len(found)
+                )
+
+            match = re.fullmatch(r"/repos/[^/]+/[^/]+/issues(?:/(\d+))?", url.path)
+            if not match:
+                return self.send_json({"message": "Not Found"}, 404)
+
+            if match.group(1):
+                issue = github.issues.get(int(match.group(1)))
+                if not issue:
+                    return self.send_json({"message": "Not Found"}, 404)
+                return self.send_json(issue)
+
+            state = query.get("state", "open")
+            since = query.get("since", "")
+            issues = [
+                i
+                for i in github.issues.values()
+                if state in ("all", i["state"]) and i["updated_at"] >= since
+            ]
+            self.send_page(url, query, issues)
+
+        def send_page(self, url, query, issues, items=None, total=None):
+            per_page = int(query.get("per_page", 30))
+            page = int(query.get("page", 1))
+            last = max(1, -(-len(issues) // per_page))
+
+            headers = []
+            if last > 1:
+                params = urlencode({**query, "page": last})
+                link = f"http://{self.headers['Host']}{url.path}?{params}"
+                headers.append(("Link", f'<{link}>; rel="last"'))
+
+            start = (page - 1) * per_page
+            body = issues[start : start + per_page]
+            if items:
+                total = len(issues) if total is None else total
+                body = {"total_count": total, items: body}
+            self.send_json(body, headers=headers)
+
+        def do_POST(self):
+            github.requests.append(f"POST {self.path}")
+            if self.reject():
+                return
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+
+            if re.fullmatch(r"/repos/[^/]+/[^/]+/issues", self.path):
+                labels = [{"name": name} for name in body.pop("labels", [])]
+                return self.send_json(github.add_issue(labels=labels, **body), 201)
+
+            if self.path != "/graphql":
+                return self.send_json({"message": "Not Found"}, 404)
+
+            variables = body["variables"]
+
+            repository = {}
+            for alias in ("open", "closed"):
+                if not variables[f"with{alias.capitalize()}"]:
+                    continue
+
+                since = variables[f"{alias}Since"] or ""
+                issues = [
+                    i
+                    for i in github.issues.values()
+                    if i["state"] == alias and i["updated_at"] >= since
+                ]
+
+                start = int(variables[alias] or 0)
+                end = start + variables["first"]
+                repository[alias] = {
+                    "pageInfo": {
+                        "hasNextPage": end < len(issues),
+                        "endCursor": str(end),
+                    },
+                    "nodes": [
+                        {
+                            "number": i["number"],
+                            "title": i["title"],
+                            "body": i["body"],
+                            "state": i["state"].upper(),
+                            "closedAt": i["closed_at"],
+                            "updatedAt": i["updated_at"],
+                            "labels": {"nodes": i["labels"]},
+                        }
+                        for i in issues[start:end]
+                    ],
+                }
+
+            self.send_json({"data": {"repository": repository}})
+
+        def do_PATCH(self):
+            github.requests.append(f"PATCH {self.path}")
+            if self.reject():
+                return
+            number = int(self.path.rsplit("/", 1)[1])
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            self.send_json(github.update_issue(number, **body))
+
+    return Handler
+
+
+@pytest.fixture
+def github():
+    fake = FakeGithub()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler(fake))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    fake.url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield fake
+
+    server.shutdown()
+    server.server_close()
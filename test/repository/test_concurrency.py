@@ -0,0 +1,85 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import tsktsk
+from tsktsk.repository import FileRepository, ShardedFileRepository
+from tsktsk.repository.file import ConcurrentModificationError
+from tsktsk.task import Category, Effort, Value
+
+PROCESSES = 24
+
+CLI = "import sys; from tsktsk.__main__ import cli; sys.argv[0] = 'tsktsk'; cli()"
+
+
+def tsktsk_processes(cwd, *commands):
+    env = dict(
+        os.environ,
+        TSKTSK_IGNORE_DOTENV="true",
+        PYTHONPATH=str(Path(tsktsk.__file__).parent.parent),
+    )
+    # each with its own cache, as when run by different users
+    return [
+        subprocess.Popen(
+            [sys.executable, "-c", CLI, *command],
+            cwd=cwd,
+            env=dict(env, TSKTSK_CACHE_PATH=str(cwd.parent / f"{cwd.name}-cache{i}")),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        for i, command in enumerate(commands)
+    ]
+
+
+@pytest.mark.parametrize("storage", ["file", "journal", "sharded"])
+def test_concurrent_adds_are_not_lost(tmp_path, storage):
+    (init,) = tsktsk_processes(tmp_path, ["init", f"--storage={storage}"])
+    assert init.wait() == 0
+
+    processes = tsktsk_processes(
+        tmp_path, *(["new", f"Task {i}"] for i in range(PROCESSES))
+    )
+    for p in processes:
+        assert p.wait() == 0, p.stderr.read()
+
+    path = tmp_path / ".tsktsk"
+    repo = ShardedFileRepository(path) if path.is_dir() else FileRepository(path)
+    tasks = list(repo)
+
+    assert sorted(int(t.key) for t in tasks) == list(range(1, PROCESSES + 1))
+    assert sorted(t.message for t in tasks) == sorted(
+        f"Task {i}" for i in range(PROCESSES)
+    )
+
+
+def test_concurrent_changes_to_other_tasks_are_kept(tmp_path):
+    path = tmp_path / ".tsktsk"
+    path.touch()
+    repo = FileRepository(path)
+    for key in ("1", "2"):
+        repo.add(Category.NEW, Value.MEDIUM, Effort.MEDIUM, f"Task {key}", set())
+
+    with repo.task("1") as first:
+        with FileRepository(path).task("2") as second:
+            second.message = "Changed"
+        first.mark_done()
+
+    assert [t.message for t in FileRepository(path)] == ["Changed"]
+
+
+def test_concurrent_changes_to_same_task_conflict(tmp_path):
+    path = tmp_path / ".tsktsk"
+    path.touch()
+    repo = FileRepository(path)
+    repo.add(Category.NEW, Value.MEDIUM, Effort.MEDIUM, "Task", set())
+
+    with pytest.raises(ConcurrentModificationError):
+        with repo.task("1") as first:
+            with FileRepository(path).task("1") as second:
+                second.message = "Changed"
+            first.mark_done()
+
+    assert [t.message for t in FileRepository(path)] == ["Changed"]
@@ -6,7 +6,7 @@ import hypothesis
 import hypothesis.strategies as st
 from _pytest.monkeypatch import MonkeyPatch
 
-from tsktsk.repository import FileRepository, GithubRepository
+from tsktsk.repository import FileRepository, GithubRepository, SqliteRepository
 from tsktsk.repository.discovery import discover_repository
 
 
@@ -31,6 +31,17 @@ def test_defaults_to_file_repository():
         assert r.path == Path(".tsktsk")
 
 
+def test_uses_sqlite_repository_when_present(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    SqliteRepository.create(Path(".tsktsk.sqlite"))
+
+    with no_conversation():
+        r = discover_repository(None, None)
+
+        assert isinstance(r, SqliteRepository)
+        assert r.path == Path(".tsktsk.sqlite")
+
+
 @hypothesis.given(github_repo=github_repo())
 def test_always_uses_explicit(github_repo):
     with no_conversation():
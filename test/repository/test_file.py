@@ -0,0 +1,282 @@
+import string
+import tempfile
+from datetime import date
+from pathlib import Path
+
+import hypothesis
+import hypothesis.strategies as st
+import pytest
+import yaml
+
+from tsktsk.repository.batch import BatchError
+from tsktsk.repository.file import (
+    FileRepository,
+    dump,
+    index_yaml,
+    load,
+    task_from_yaml,
+    task_to_yaml,
+)
+from tsktsk.task import Category, Effort, Task, Value
+
+
+@st.composite
+def task(draw):
+    return Task(
+        key=draw(st.integers(min_value=1).map(str)),
+        message=draw(st.text(alphabet=string.printable, min_size=1)),
+        category=draw(st.sampled_from(Category)),
+        value=draw(st.sampled_from(Value)),
+        effort=draw(st.sampled_from(Effort)),
+        dependencies=draw(st.sets(st.integers(min_value=1).map(str))),
+        done=draw(st.none() | st.dates(min_value=date(1000, 1, 1))),
+    )
+
+
+@hypothesis.given(task=task())
+def test_yaml_round_trip(task):
+    assert task_from_yaml(task_to_yaml(task)) == task
+
+
+@hypothesis.given(
+    category=st.sampled_from(Category),
+    value=st.sampled_from(Value),
+    effort=st.sampled_from(Effort),
+)
+def test_enum_names_are_case_insensitive(category, value, effort):
+    values = {
+        "key": "1",
+        "message": "Task",
+        "category": category.name.lower(),
+        "value": value.name.upper(),
+        "effort": effort.name.capitalize(),
+    }
+
+    task = task_from_yaml(values)
+
+    assert task.category == category
+    assert task.value == value
+    assert task.effort == effort
+    assert task.dependencies == set()
+    assert task.done is None
+
+
+@hypothesis.given(tasks=st.lists(task()))
+def test_index_finds_each_task(tasks):
+    with tempfile.TemporaryDirectory() as tmp:
+        tasks = {t.key: task_to_yaml(t) for t in tasks}
+        text = dump(tasks, Path(tmp, ".tsktsk")).encode("utf-8")
+
+    index = index_yaml(text)
+    assert index.keys() == tasks.keys()
+    for key, (start, end) in index.items():
+        assert yaml.safe_load(text[start:end]) == {key: tasks[key]}
+
+
+def create_repository(path):
+    path.touch()
+    repo = FileRepository(path)
+    repo.add(Category.NEW, Value.HIGH, Effort.LOW, "First Task", set())
+    repo.add(Category.FIX, Value.LOW, Effort.HIGH, "Second Task", {"1"})
+    return repo
+
+
+def test_reading_does_not_write(tmp_path):
+    repo = create_repository(tmp_path / ".tsktsk")
+    before = repo.path.stat()
+    files = sorted(tmp_path.iterdir())
+
+    assert [t.key for t in repo] == ["1", "2"]
+    assert repo.tasks_done_between(date.min, date.max) == []
+    with repo.task("1"):
+        pass
+
+    assert repo.path.stat().st_mtime_ns == before.st_mtime_ns
+    assert repo.path.stat().st_ino == before.st_ino
+    assert sorted(tmp_path.iterdir()) == files
+
+
+def test_writes_replace_file(tmp_path):
+    repo = create_repository(tmp_path / ".tsktsk")
+    before = repo.path.stat()
+
+    with repo.task("1") as t:
+        t.mark_done()
+
+    assert repo.path.stat().st_ino != before.st_ino
+    assert [t.key for t in repo] == ["2"]
+    assert list(tmp_path.iterdir()) == [repo.path]
+
+
+def test_journal_appends_changes(tmp_path):
+    path = tmp_path / ".tsktsk"
+    path.with_name(".tsktsk.journal").touch()
+    repo = create_repository(path)
+
+    with repo.task("1") as t:
+        t.mark_done()
+
+    assert path.read_text() == ""
+    assert len(repo.journal.read_text().splitlines()) == 3
+    assert [t.key for t in FileRepository(path)] == ["2"]
+
+
+def test_journal_ignores_torn_records(tmp_path):
+    path = tmp_path / ".tsktsk"
+    path.with_name(".tsktsk.journal").touch()
+    repo = create_repository(path)
+
+    with repo.journal.open(mode="a") as f:
+        f.write('{"key": "1", "mess')
+
+    repo = FileRepository(path)
+    with repo.task("2") as t:
+        t.mark_done()
+
+    assert [t.key for t in FileRepository(path)] == ["1"]
+
+
+def test_journal_add_does_not_read_every_task(tmp_path, monkeypatch):
+    path = tmp_path / ".tsktsk"
+    path.with_name(".tsktsk.journal").touch()
+    repo = create_repository(path)
+    repo.compact(repo.read())
+    repo.add(Category.NEW, Value.MEDIUM, Effort.MEDIUM, "Third Task", set())
+
+    monkeypatch.setattr(repo, "read", lambda: pytest.fail("read every task"))
+    task = repo.add(Category.NEW, Value.MEDIUM, Effort.MEDIUM, "Task", {"1", "3"})
+
+    assert task.key == "4"
+    with pytest.raises(ValueError):
+        repo.add(Category.NEW, Value.MEDIUM, Effort.MEDIUM, "Task", {"9"})
+
+
+def test_journal_finds_unarchived_tasks(tmp_path):
+    path = tmp_path / ".tsktsk"
+    path.with_name(".tsktsk.journal").touch()
+    repo = create_repository(path)
+
+    with repo.task("1") as t:
+        t.done = date(2020, 5, 17)
+    assert repo.archive() == 1
+
+    with repo.task("1") as t:
+        t.done = None
+
+    assert all(line.startswith('{"key": ') for line in repo.journal.open())
+    assert repo.find("1")["message"] == "First Task"
+    assert sorted(t.key for t in FileRepository(path)) == ["1", "2"]
+
+
+def test_archived_tasks_stay_archived_until_changed(tmp_path):
+    repo = create_repository(tmp_path / ".tsktsk")
+    for key in ("1", "2"):
+        with repo.task(key) as t:
+            t.done = date(2020, 5, 17)
+    assert repo.archive() == 2
+
+    with repo.task("1") as t:
+        assert t.done == date(2020, 5, 17)
+    with repo.batch(["1", "2"]) as tasks:
+        assert len(tasks) == 2
+    assert load(repo.path) == {}
+
+    with repo.batch(["1", "2"]) as tasks:
+        tasks["2"].done = None
+    assert list(load(repo.path)) == ["2"]
+    assert list(repo.archived.find(["1", "2"])) == ["1"]
+
+
+def test_unarchive_keeps_task_if_interrupted(tmp_path, monkeypatch):
+    repo = create_repository(tmp_path / ".tsktsk")
+    with repo.task("1") as t:
+        t.done = date(2020, 5, 17)
+    assert repo.archive() == 1
+
+    def crash(keys):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(repo.archived, "remove", crash)
+    with pytest.raises(KeyboardInterrupt):
+        with repo.task("1") as t:
+            t.done = None
+
+    assert repo.find("1")["message"] == "First Task"
+    assert repo.archived.find(["1"])
+
+
+def test_journal_is_compacted(tmp_path, monkeypatch):
+    monkeypatch.setattr("tsktsk.repository.file.COMPACT_SIZE", 500)
+    path = tmp_path / ".tsktsk"
+    path.with_name(".tsktsk.journal").touch()
+    repo = create_repository(path)
+
+    for _ in range(3):
+        repo.add(Category.NEW, Value.MEDIUM, Effort.MEDIUM, "Task", set())
+
+    assert repo.journal.stat().st_size < 500
+    assert len(load(path)) >= 4
+    assert [t.key for t in FileRepository(path)] == ["1", "2", "3", "4", "5"]
+
+
+def test_archived_tasks_are_found_by_date(tmp_path):
+    repo = create_repository(tmp_path / ".tsktsk")
+    with repo.task("1") as t:
+        t.done = date(2020, 5, 17)
+    with repo.task("2") as t:
+        t.done = date(2020, 7, 1)
+
+    assert repo.archive() == 2
+    assert load(repo.path) == {}
+    assert sorted(p.name for p in repo.archived.path.iterdir()) == [
+        "202005.yaml",
+        "202007.yaml",
+        "manifest.yaml",
+    ]
+
+    june = repo.tasks_done_between(date(2020, 6, 1), date(2020, 6, 30))
+    summer = repo.tasks_done_between(date(2020, 5, 17), date(2020, 7, 1))
+
+    assert june == []
+    assert sorted(t.key for t in summer) == ["1", "2"]
+
+
+def test_index_is_rebuilt_when_file_changes(tmp_path):
+    repo = create_repository(tmp_path / ".tsktsk")
+    assert repo.find("2")["message"] == "Second Task"
+
+    tasks = load(repo.path)
+    tasks["2"]["message"] = "Edited by hand"
+    dump({"3": tasks["1"], **tasks}, repo.path)
+
+    repo = FileRepository(repo.path)
+    assert repo.find("2")["message"] == "Edited by hand"
+    assert repo.find("4") is None
+
+
+def test_batch_writes_once(tmp_path, monkeypatch):
+    repo = create_repository(tmp_path / ".tsktsk")
+    writes = []
+    monkeypatch.setattr(repo, "write", lambda *args: writes.append(args))
+
+    with pytest.raises(BatchError) as e:
+        with repo.batch(["1", "3", "2"]) as tasks:
+            for task in tasks.values():
+                task.mark_done()
+
+    assert list(e.value.failures) == ["3"]
+    assert len(writes) == 1
+    assert list(writes[0][0]) == ["1", "2"]
+
+
+def test_get_many_reads_checkpoint_and_journal(tmp_path):
+    path = tmp_path / ".tsktsk"
+    repo = create_repository(path)
+    repo.journal.touch()
+    with repo.task("2") as t:
+        t.message = "Changed"
+
+    tasks = FileRepository(path).get_many(["1", "2", "3"])
+
+    assert sorted(tasks) == ["1", "2"]
+    assert tasks["2"].message == "Changed"
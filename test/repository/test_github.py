@@ -1,9 +1,23 @@
+import json
 import string
+from datetime import date, datetime, timedelta, timezone
 
 import hypothesis
 import hypothesis.strategies as st
+import pytest
 
-from tsktsk.repository.github import task_from_json
+from tsktsk.repository.batch import BatchError
+from tsktsk.repository.cache import HttpCache
+from tsktsk.repository.github import (
+    Engine,
+    GithubRepository,
+    date_from_str,
+    local_dates,
+    local_tz,
+    task_from_json,
+    tasks_from_page,
+    utc_tm,
+)
 from tsktsk.task import Category, Effort, Value
 
 
@@ -56,3 +70,197 @@ def test_random_non_tsktsk_task_from_json(number, title, labels, body):
     assert task.effort == Effort.MEDIUM
     assert len(task.dependencies) == 0
     assert not task.done
+
+
+@hypothesis.given(
+    time=st.datetimes(min_value=datetime(1970, 1, 2), max_value=datetime(9999, 1, 1))
+)
+def test_date_from_str_is_local_date(time):
+    value = time.strftime("%Y-%m-%dT%H:%M:%SZ")
+    local = time.replace(tzinfo=timezone.utc).astimezone(local_tz)
+    assert date_from_str(value) == local.date()
+
+
+@pytest.mark.parametrize("minutes", [0, 9 * 60, -5 * 60, 5 * 60 + 30, -(9 * 60 + 30)])
+def test_date_from_str_in_other_time_zones(minutes, monkeypatch):
+    offset = timedelta(minutes=minutes)
+    monkeypatch.setattr("tsktsk.repository.github.local_tm", utc_tm + offset)
+    local_dates.cache_clear()
+
+    try:
+        start = datetime(2020, 2, 28)
+        for step in range(0, 3 * 24 * 60, 15):
+            time = start + timedelta(minutes=step, seconds=step % 60)
+            value = time.strftime("%Y-%m-%dT%H:%M:%SZ")
+            assert date_from_str(value) == (time + offset).date(), value
+    finally:
+        local_dates.cache_clear()
+
+
+def test_page_of_issues_is_decoded_without_pull_requests():
+    issue = {
+        "title": "🐛 FIX: Something",
+        "labels": [{"name": "V⬆"}, {"name": "E⬇"}, {"name": "bug"}],
+        "closed_at": "2020-01-01T12:00:00Z",
+        "body": "dependencies: #1, #2\nmore",
+    }
+    page = [
+        {"number": 3, **issue},
+        {"number": 4, "pull_request": {"url": "..."}, **issue},
+    ]
+
+    tasks = list(tasks_from_page(json.dumps(page).encode("utf-8")))
+
+    assert [t.key for t in tasks] == ["3"]
+    assert tasks[0].category == Category.FIX
+    assert tasks[0].value == Value.HIGH
+    assert tasks[0].effort == Effort.LOW
+    assert tasks[0].additional_labels == ["bug"]
+    assert tasks[0].dependencies == {"1", "2"}
+    assert tasks[0].additional_body == "more"
+
+
+def test_all_pages_of_issues_are_read(github):
+    for number in range(1, 251):
+        github.add_issue(f"Issue {number}")
+
+    keys = [task.key for task in GithubRepository("owner/repo", api_url=github.url)]
+
+    assert keys == [str(number) for number in range(1, 251)]
+    assert len(github.requests) == 3
+
+
+def test_batch_reports_each_failure(github):
+    github.add_issue("First")
+    github.add_issue("Second")
+
+    with pytest.raises(BatchError) as e:
+        with GithubRepository("owner/repo", api_url=github.url).batch(
+            ["1", "3", "2"]
+        ) as tasks:
+            for task in tasks.values():
+                task.mark_done()
+
+    assert list(e.value.failures) == ["3"]
+    assert [i["state"] for i in github.issues.values()] == ["closed", "closed"]
+
+
+def test_unchanged_issues_are_read_from_cache(github, tmp_path):
+    for number in range(1, 151):
+        github.add_issue(f"Issue {number}")
+    cache = HttpCache(tmp_path)
+
+    first = list(GithubRepository("owner/repo", cache=cache, api_url=github.url))
+    assert (cache.hits, cache.misses) == (0, 2)
+
+    second = list(GithubRepository("owner/repo", cache=cache, api_url=github.url))
+    assert (cache.hits, cache.misses) == (2, 2)
+    assert first == second
+
+    github.add_issue("Another issue")
+    third = list(GithubRepository("owner/repo", cache=cache, api_url=github.url))
+    assert (cache.hits, cache.misses) == (3, 3)
+    assert len(third) == 151
+
+
+def test_cache_evicts_least_recently_used(github, tmp_path):
+    github.add_issue("First")
+    github.add_issue("Second")
+    cache = HttpCache(tmp_path)
+
+    with GithubRepository("owner/repo", cache=cache, api_url=github.url).task("1"):
+        pass
+    (entry,) = tmp_path.iterdir()
+    cache.max_size = entry.stat().st_size * 3 // 2
+
+    with GithubRepository("owner/repo", cache=cache, api_url=github.url).task("2"):
+        pass
+
+    (entry,) = tmp_path.iterdir()
+    assert "Second" in entry.read_text()
+
+
+def test_cache_is_scanned_only_when_full(github, tmp_path, monkeypatch):
+    for number in range(1, 351):
+        github.add_issue(f"Issue {number}")
+    cache = HttpCache(tmp_path)
+    scans = []
+    evict = cache.evict
+    monkeypatch.setattr(cache, "evict", lambda: scans.append(1) or evict())
+
+    list(GithubRepository("owner/repo", cache=cache, api_url=github.url))
+
+    assert len(scans) == 1
+    assert cache.size == sum(p.stat().st_size for p in tmp_path.iterdir())
+
+
+def test_graphql_reads_open_and_recently_closed_issues_together(github):
+    for number in range(1, 151):
+        github.add_issue(f"Issue {number}")
+    github.update_issue(2, state="closed")
+
+    repo = GithubRepository("owner/repo", engine=Engine.GRAPHQL, api_url=github.url)
+    today = date.today()
+
+    assert len(list(repo)) == 149
+    assert [
+        t.key for t in repo.tasks_done_between(today - timedelta(days=7), today)
+    ] == ["2"]
+    assert github.requests == ["POST /graphql", "POST /graphql"]
+
+
+def test_get_many_fetches_only_those_issues(github):
+    for number in range(1, 251):
+        github.add_issue(f"Issue {number}")
+
+    tasks = GithubRepository("owner/repo", api_url=github.url).get_many(["3", "300"])
+
+    assert list(tasks) == ["3"]
+    assert len(github.requests) == 2
+
+
+def test_done_tasks_are_searched_by_closed_date(github):
+    for number in range(1, 151):
+        github.add_issue(f"Issue {number}")
+    for number in range(1, 121):
+        github.update_issue(number, state="closed")
+    github.add_issue("Old", state="closed", closed_at="2001-01-01T00:00:00Z")
+
+    repo = GithubRepository("owner/repo", api_url=github.url)
+    today = date.today()
+    done = repo.tasks_done_between(today - timedelta(days=60), today)
+
+    assert len(done) == 120
+    assert all(r.startswith("GET /search/issues") for r in github.requests)
+    assert len(github.requests) == 2
+
+
+def test_done_tasks_are_listed_when_search_is_truncated(github, monkeypatch):
+    monkeypatch.setattr("tsktsk.repository.github.SEARCH_LIMIT", 100)
+    github.search_limit = 100
+    for number in range(1, 151):
+        github.add_issue(f"Issue {number}")
+    for number in range(1, 121):
+        github.update_issue(number, state="closed")
+
+    repo = GithubRepository("owner/repo", api_url=github.url)
+    today = date.today()
+    done = repo.tasks_done_between(today - timedelta(days=60), today)
+
+    assert len(done) == 120
+    assert github.requests[0].startswith("GET /search/issues")
+    assert all(r.startswith("GET /repos/") for r in github.requests[1:])
+
+
+def test_every_done_task_is_listed_without_search(github):
+    for number in range(1, 151):
+        github.add_issue(
+            f"Issue {number}", state="closed", closed_at="2001-01-01T00:00:00Z"
+        )
+    github.add_issue("Open")
+
+    repo = GithubRepository("owner/repo", api_url=github.url)
+    done = repo.tasks_done_between(date.min, date.max)
+
+    assert len(done) == 150
+    assert not any(r.startswith("GET /search/issues") for r in github.requests)
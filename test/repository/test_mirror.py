@@ -0,0 +1,118 @@
+import functools
+import sqlite3
+from datetime import date, timedelta, timezone
+
+import pytest
+
+import tsktsk.db.auth as auth_dao
+import tsktsk.db.issues as issues_dao
+from tsktsk.db import apply_migrations
+from tsktsk.db.auth import GithubAuth
+from tsktsk.repository.mirror import MirroredGithubRepository
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    path = str(tmp_path / "tsktsk.sqlite")
+    monkeypatch.setenv("TSKTSK_DB_PATH", path)
+    apply_migrations(path)
+
+
+def test_only_updated_issues_are_fetched(github, db):
+    for number in range(1, 151):
+        github.add_issue(f"Issue {number}")
+
+    assert len(list(MirroredGithubRepository("owner/repo", api_url=github.url))) == 150
+    assert len(github.requests) == 2
+
+    github.requests.clear()
+    github.update_issue(3, state="closed")
+    github.update_issue(7, title="Changed")
+
+    tasks = {
+        t.key: t for t in MirroredGithubRepository("owner/repo", api_url=github.url)
+    }
+    assert len(tasks) == 149
+    assert tasks["7"].message == "Changed"
+    assert len(github.requests) == 1
+    assert "since=" in github.requests[0]
+
+
+def test_issues_updated_during_a_sync_are_fetched_next_time(github, db):
+    for number in range(1, 151):
+        github.add_issue(f"Issue {number}")
+
+    def update_while_paging(path):
+        if "page=2" in path:
+            github.before_get = None
+            # issue 10 is on the first page, already read, issue 120 on this one
+            github.update_issue(10, title="Changed")
+            github.update_issue(120, title="Also changed")
+
+    github.before_get = update_while_paging
+    list(MirroredGithubRepository("owner/repo", api_url=github.url))
+
+    tasks = {
+        t.key: t for t in MirroredGithubRepository("owner/repo", api_url=github.url)
+    }
+    assert tasks["10"].message == "Changed"
+    assert tasks["120"].message == "Also changed"
+
+
+def test_done_tasks_are_read_from_mirror(github, db):
+    github.add_issue("First")
+    github.add_issue("Second")
+
+    repo = MirroredGithubRepository("owner/repo", api_url=github.url)
+    with repo.task("2") as task:
+        task.mark_done()
+
+    done = repo.tasks_done_between(date(2000, 1, 1), date(2100, 1, 1))
+    assert [t.key for t in done] == ["2"]
+
+
+def test_tasks_are_found_in_mirror(github, db):
+    for number in range(1, 6):
+        github.add_issue(f"Issue {number}")
+
+    repo = MirroredGithubRepository("owner/repo", api_url=github.url)
+    list(repo)
+    github.requests.clear()
+
+    tasks = repo.get_many(["2", "4", "9", "x"])
+
+    assert {key: t.message for key, t in tasks.items()} == {
+        "2": "Issue 2",
+        "4": "Issue 4",
+    }
+    assert len(github.requests) == 1
+    assert "since=" in github.requests[0]
+
+
+def test_every_done_task_is_read_east_of_utc(github, db, monkeypatch):
+    monkeypatch.setattr(
+        "tsktsk.repository.github.local_tz", timezone(timedelta(hours=9))
+    )
+    github.add_issue("First", state="closed", closed_at="2001-01-01T00:00:00Z")
+    github.add_issue("Second")
+
+    repo = MirroredGithubRepository("owner/repo", api_url=github.url)
+    done = repo.tasks_done_between(date.min, date.max)
+
+    assert [t.key for t in done] == ["1"]
+
+
+def test_database_is_writable_while_issues_are_fetched(db, monkeypatch):
+    monkeypatch.setattr(
+        "sqlite3.connect", functools.partial(sqlite3.connect, timeout=0)
+    )
+
+    def issues():
+        for number in range(1, 4):
+            yield {"number": number, "state": "open", "updated_at": f"2020-0{number}"}
+            auth_dao.add_or_update(str(number), GithubAuth("user", "token"))
+
+    issues_dao.merge("owner/repo", issues())
+
+    assert [i["number"] for i in issues_dao.find("owner/repo")] == [3, 2, 1]
+    assert auth_dao.find("3") == GithubAuth("user", "token")
@@ -0,0 +1,68 @@
+import pytest
+import requests
+
+from tsktsk.repository.github import GithubRepository
+from tsktsk.repository.ratelimit import RateLimit, RateLimitExceeded
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+
+
+def response(remaining, reset, limit=5000):
+    response = requests.Response()
+    response.headers.update(
+        {
+            "X-RateLimit-Limit": str(limit),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(reset),
+        }
+    )
+    return response
+
+
+def test_waits_for_reset_when_budget_is_used():
+    clock = Clock()
+    limit = RateLimit(clock=clock, sleep=clock.sleep)
+    limit.update(response(remaining=0, reset=clock.now + 30))
+
+    assert limit.acquire() == 30
+    assert clock.slept == [30]
+
+
+def test_gives_up_when_reset_is_too_far():
+    clock = Clock()
+    limit = RateLimit(clock=clock, sleep=clock.sleep)
+    limit.update(response(remaining=0, reset=clock.now + 3600))
+
+    with pytest.raises(RateLimitExceeded):
+        limit.acquire()
+
+
+def test_spreads_low_budget_until_reset():
+    clock = Clock()
+    limit = RateLimit(clock=clock, sleep=clock.sleep)
+    limit.update(response(remaining=5, reset=clock.now + 50, limit=100))
+
+    assert [limit.acquire() for _ in range(3)] == [0, 10, 22.5]
+    assert limit.remaining == 2
+
+
+def test_rate_limited_requests_are_retried(github):
+    github.add_issue("First")
+    github.rate_limited = 2
+
+    repo = GithubRepository("owner/repo", api_url=github.url)
+    repo.rate_limit.sleep = lambda seconds: None
+
+    assert [t.key for t in repo] == ["1"]
+    assert len(github.requests) == 3
+    assert repo.rate_limit.remaining == github.remaining
@@ -0,0 +1,39 @@
+from tsktsk.repository.cache import HttpCache
+from tsktsk.repository.github import GithubRepository
+from tsktsk.repository.sessions import connection_stats
+
+
+def test_repositories_share_a_session(github):
+    first = GithubRepository("owner/repo", api_url=github.url)
+    second = GithubRepository("other/repo", api_url=github.url)
+
+    assert first.http is second.http
+
+
+def test_connections_are_reused_between_repositories(github):
+    for i in range(5):
+        github.add_issue(f"Task {i}")
+
+    before = connection_stats()
+    for _ in range(5):
+        list(GithubRepository("owner/repo", api_url=github.url))
+    after = connection_stats()
+
+    assert after["requests"] - before["requests"] == 5
+    assert after["connections"] - before["connections"] == 1
+
+
+def test_repositories_count_on_the_cache_of_their_session(github, tmp_path):
+    github.add_issue("First")
+
+    first = GithubRepository(
+        "owner/repo", cache=HttpCache(tmp_path), api_url=github.url
+    )
+    second = GithubRepository(
+        "owner/repo", cache=HttpCache(tmp_path), api_url=github.url
+    )
+    list(first)
+    list(second)
+
+    assert first.cache is second.cache
+    assert (second.cache.hits, second.cache.misses) == (1, 1)
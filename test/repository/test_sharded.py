@@ -0,0 +1,79 @@
+from datetime import date
+
+import pytest
+
+from tsktsk.repository.file import load
+from tsktsk.repository.sharded import ShardedFileRepository
+from tsktsk.task import Category, Effort, Task, Value
+
+
+@pytest.fixture
+def repo(tmp_path):
+    tasks = [Task(str(key), f"Task {key}") for key in range(1, 6)]
+    return ShardedFileRepository.create(tmp_path / ".tsktsk", tasks, bucket_size=2)
+
+
+def test_create_splits_tasks_into_buckets(repo):
+    shards = sorted(p.name for p in (repo.path / "tasks").iterdir())
+
+    assert shards == ["0.yaml", "1.yaml", "2.yaml"]
+    assert [t.key for t in repo] == ["1", "2", "3", "4", "5"]
+
+
+def test_add_uses_next_key(repo):
+    task = repo.add(Category.NEW, Value.HIGH, Effort.LOW, "Task", {"1", "5"})
+
+    assert task.key == "6"
+    assert (repo.path / "tasks" / "3.yaml").exists()
+    assert repo.manifest()["next_key"] == 7
+    assert sorted(p.name for p in repo.path.iterdir()) == ["manifest.yaml", "tasks"]
+
+
+def test_add_with_missing_dependency(repo):
+    with pytest.raises(ValueError):
+        repo.add(Category.NEW, Value.HIGH, Effort.LOW, "Task", {"1", "9", "x"})
+
+
+def test_task_only_writes_its_bucket(repo):
+    before = {p.name: p.stat().st_ino for p in (repo.path / "tasks").iterdir()}
+
+    with repo.task("3") as t:
+        t.done = date(2020, 5, 17)
+
+    after = {p.name: p.stat().st_ino for p in (repo.path / "tasks").iterdir()}
+    assert [name for name in before if before[name] != after[name]] == ["1.yaml"]
+    assert [t.key for t in repo] == ["1", "2", "4", "5"]
+    assert [t.key for t in repo.tasks_done_between(date.min, date.max)] == ["3"]
+
+
+def test_missing_task(repo):
+    for key in ("9", "x"):
+        with pytest.raises(KeyError):
+            with repo.task(key):
+                pass
+
+
+def test_archived_tasks_can_be_depended_on(repo):
+    with repo.task("1") as t:
+        t.done = date(2020, 5, 17)
+    assert repo.archive() == 1
+
+    task = repo.add(Category.NEW, Value.HIGH, Effort.LOW, "Task", {"1"})
+
+    assert task.dependencies == {"1"}
+    assert sorted(repo.get_many(["1", "2", "9"])) == ["1", "2"]
+
+
+def test_archived_tasks_stay_archived_until_changed(repo):
+    with repo.task("1") as t:
+        t.done = date(2020, 5, 17)
+    assert repo.archive() == 1
+
+    with repo.task("1"):
+        pass
+    assert "1" not in load(repo.shard("1", repo.manifest()))
+
+    with repo.task("1") as t:
+        t.done = None
+    assert "1" in load(repo.shard("1", repo.manifest()))
+    assert not repo.archived.find(["1"])
@@ -0,0 +1,82 @@
+import string
+from datetime import date
+
+import hypothesis
+import hypothesis.strategies as st
+import pytest
+
+from tsktsk.repository.sqlite import SqliteRepository
+from tsktsk.task import Category, Effort, Task, Value
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = SqliteRepository.create(tmp_path / ".tsktsk.sqlite")
+    repo.add(Category.NEW, Value.HIGH, Effort.LOW, "First Task", set())
+    repo.add(Category.FIX, Value.LOW, Effort.HIGH, "Second Task", {"1"})
+    return repo
+
+
+def test_add_and_iter(repo):
+    first, second = repo
+
+    assert first.key == "1"
+    assert first.value == Value.HIGH
+    assert second.key == "2"
+    assert second.category == Category.FIX
+    assert second.dependencies == {"1"}
+
+
+def test_get_many(repo):
+    tasks = repo.get_many(["2", "5", "x"])
+
+    assert list(tasks) == ["2"]
+    assert tasks["2"].dependencies == {"1"}
+
+
+def test_add_with_missing_dependency(repo):
+    with pytest.raises(ValueError):
+        repo.add(Category.NEW, Value.HIGH, Effort.LOW, "Task", {"1", "7"})
+
+
+def test_done_tasks(repo):
+    with repo.task("1") as t:
+        t.done = date(2020, 5, 17)
+    with repo.task("2") as t:
+        t.dependencies = set()
+        t.done = date(2020, 6, 1)
+
+    assert [t.key for t in repo] == []
+    assert [
+        t.key for t in repo.tasks_done_between(date(2020, 5, 1), date(2020, 5, 31))
+    ] == ["1"]
+    assert (
+        repo.tasks_done_between(date(2020, 5, 18), date(2020, 6, 1))[0].dependencies
+        == set()
+    )
+
+
+def test_missing_task(repo):
+    with pytest.raises(KeyError):
+        with repo.task("3"):
+            pass
+
+
+@hypothesis.given(
+    key=st.integers(min_value=1, max_value=2 ** 63 - 1),
+    message=st.text(alphabet=string.printable, min_size=1),
+    category=st.sampled_from(Category),
+    value=st.sampled_from(Value),
+    effort=st.sampled_from(Effort),
+    done=st.none() | st.dates(),
+)
+def test_create_preserves_tasks(
+    tmp_path_factory, key, message, category, value, effort, done
+):
+    path = tmp_path_factory.mktemp("sqlite") / ".tsktsk.sqlite"
+    task = Task(str(key), message, category, value, effort, set(), done)
+
+    repo = SqliteRepository.create(path, [task])
+
+    with repo.task(task.key) as t:
+        assert t == task
@@ -0,0 +1,157 @@
+import io
+import string
+from datetime import date
+
+import hypothesis
+import hypothesis.strategies as st
+import pytest
+
+import tsktsk.repository.file
+from tsktsk.repository.file import FileRepository
+from tsktsk.repository.github import GithubRepository
+from tsktsk.repository.sharded import ShardedFileRepository
+from tsktsk.repository.sqlite import SqliteRepository
+from tsktsk.repository.transfer import (
+    export_tasks,
+    import_tasks,
+    read_tasks,
+    task_from_json,
+    task_to_json,
+    write_tasks,
+)
+from tsktsk.task import Category, Effort, Task, Value
+
+
+@st.composite
+def task(draw):
+    return Task(
+        key=draw(st.integers(min_value=1).map(str)),
+        message=draw(st.text(alphabet=string.printable, min_size=1)),
+        category=draw(st.sampled_from(Category)),
+        value=draw(st.sampled_from(Value)),
+        effort=draw(st.sampled_from(Effort)),
+        dependencies=draw(st.sets(st.integers(min_value=1).map(str))),
+        done=draw(st.none() | st.dates(min_value=date(1000, 1, 1))),
+    )
+
+
+@hypothesis.given(task=task())
+def test_json_round_trip(task):
+    assert task_from_json(task_to_json(task)) == task
+
+
+def file_repository(path):
+    path.touch()
+    repo = FileRepository(path)
+    repo.add(Category.NEW, Value.HIGH, Effort.LOW, "first", set())
+    repo.add(Category.FIX, Value.LOW, Effort.HIGH, "second", {"1"})
+    repo.add(Category.DOC, Value.MEDIUM, Effort.MEDIUM, "third", {"1", "2"})
+    with repo.task("1") as t:
+        t.done = date(2020, 1, 1)
+    return repo
+
+
+def exported(repo):
+    output = io.StringIO()
+    write_tasks(export_tasks(repo), output)
+    return list(read_tasks(io.StringIO(output.getvalue())))
+
+
+def test_export_includes_done_tasks(tmp_path):
+    tasks = exported(file_repository(tmp_path / "tsktsk"))
+
+    assert sorted(t.key for t in tasks) == ["1", "2", "3"]
+    assert next(t for t in tasks if t.key == "1").done == date(2020, 1, 1)
+
+
+def test_import_into_an_empty_repository_keeps_keys(tmp_path):
+    tasks = exported(file_repository(tmp_path / "source"))
+
+    (tmp_path / "target").touch()
+    target = FileRepository(tmp_path / "target")
+    keys = import_tasks(target, tasks, tmp_path / "checkpoint")
+
+    assert keys == {"1": "1", "2": "2", "3": "3"}
+    assert sorted(exported(target), key=lambda t: t.key) == sorted(
+        tasks, key=lambda t: t.key
+    )
+    assert not (tmp_path / "checkpoint").exists()
+
+
+def test_import_writes_a_file_repository_once(tmp_path, monkeypatch):
+    tasks = exported(file_repository(tmp_path / "source"))
+
+    (tmp_path / "target").touch()
+    target = FileRepository(tmp_path / "target")
+    dumped = []
+    dump = tsktsk.repository.file.dump
+    monkeypatch.setattr(
+        "tsktsk.repository.file.dump", lambda *args: dumped.append(args) or dump(*args)
+    )
+    import_tasks(target, tasks, tmp_path / "checkpoint")
+
+    assert len(dumped) == 1
+    assert target.get_many(["3"])["3"].dependencies == {"1", "2"}
+
+
+@pytest.mark.parametrize(
+    "create",
+    [
+        lambda path: ShardedFileRepository.create(path, bucket_size=2),
+        SqliteRepository.create,
+    ],
+)
+def test_import_into_other_local_repositories(tmp_path, create):
+    tasks = exported(file_repository(tmp_path / "source"))
+
+    target = create(tmp_path / "target")
+    target.add(Category.NEW, Value.HIGH, Effort.LOW, "existing", set())
+    keys = import_tasks(target, tasks, tmp_path / "checkpoint")
+
+    assert keys == {"1": "2", "2": "3", "3": "4"}
+    imported = target.get_many(["2", "3", "4"])
+    assert imported["3"].dependencies == {"2"}
+    assert imported["4"].dependencies == {"2", "3"}
+    assert imported["2"].done == date(2020, 1, 1)
+    assert [t.key for t in target] == ["1", "3", "4"]
+
+
+def test_import_remaps_dependencies(tmp_path):
+    tasks = exported(file_repository(tmp_path / "source"))
+
+    target = file_repository(tmp_path / "target")
+    keys = import_tasks(target, tasks, tmp_path / "checkpoint")
+
+    assert keys == {"1": "4", "2": "5", "3": "6"}
+    imported = target.get_many(["4", "5", "6"])
+    assert imported["5"].dependencies == {"4"}
+    assert imported["6"].dependencies == {"4", "5"}
+    assert imported["4"].done == date(2020, 1, 1)
+
+
+def test_import_resumes_from_checkpoint(tmp_path):
+    tasks = exported(file_repository(tmp_path / "source"))
+
+    (tmp_path / "target").touch()
+    target = FileRepository(tmp_path / "target")
+    target.add(Category.NEW, Value.HIGH, Effort.LOW, "first", set())
+
+    checkpoint = tmp_path / "checkpoint"
+    checkpoint.write_text('{"key": "1", "new": "1"}\n{"key": "2", "n')
+    import_tasks(target, tasks, checkpoint)
+
+    assert sorted(t.message for t in exported(target)) == ["first", "second", "third"]
+    assert target.get_many(["3"])["3"].dependencies == {"1", "2"}
+
+
+def test_import_into_github(tmp_path, github):
+    tasks = exported(file_repository(tmp_path / "source"))
+
+    repo = GithubRepository("owner/repo", api_url=github.url)
+    keys = import_tasks(repo, tasks, tmp_path / "checkpoint", workers=3)
+
+    assert sorted(keys) == ["1", "2", "3"]
+    imported = repo.get_many(keys.values())
+    assert imported[keys["2"]].dependencies == {keys["1"]}
+    assert imported[keys["3"]].dependencies == {keys["1"], keys["2"]}
+    assert imported[keys["1"]].done
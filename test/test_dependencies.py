@@ -0,0 +1,262 @@
+from datetime import date
+from unittest.mock import patch
+
+import hypothesis
+import hypothesis.strategies as st
+import pytest
+
+from tsktsk import dependencies
+from tsktsk.dependencies import (
+    DependencyGraph,
+    DependencyIndex,
+    ordered_tasks,
+    sort_tasks_by_roi,
+)
+from tsktsk.repository.file import FileRepository
+from tsktsk.repository.sharded import ShardedFileRepository
+from tsktsk.repository.sqlite import SqliteRepository
+from tsktsk.task import Category, Effort, Task, TaskError, Value
+
+
+def keys(tasks):
+    return [t.key for t in tasks]
+
+
+def test_tasks_unblocking_more_value_come_first():
+    tasks = [
+        Task("1", "small"),
+        Task("2", "unblocks"),
+        Task("3", "middle", dependencies={"2"}),
+        Task("4", "valuable", value=Value.HIGH, effort=Effort.LOW, dependencies={"3"}),
+        Task("5", "even", value=Value.HIGH, effort=Effort.HIGH),
+    ]
+
+    # 2 unblocks 4 only through 3, so would be even with 1 and 5 without it
+    assert keys(sort_tasks_by_roi(tasks)) == ["2", "3", "4", "1", "5"]
+
+
+def test_shared_dependents_are_split_between_their_dependencies():
+    tasks = [
+        Task("1", "first"),
+        Task("2", "second"),
+        Task(
+            "3", "shared", value=Value.HIGH, effort=Effort.LOW, dependencies={"1", "2"}
+        ),
+        Task("4", "alone", value=Value.HIGH, effort=Effort.MEDIUM),
+    ]
+
+    # alone: 8/5, first and second: (5 + 8/2) / (5 + 3/2)
+    assert keys(sort_tasks_by_roi(tasks)) == ["4", "1", "2", "3"]
+
+
+def test_tasks_in_cycles_are_listed_last():
+    tasks = [
+        Task("1", "first", dependencies={"2"}),
+        Task("2", "second", dependencies={"3"}),
+        Task("3", "third", dependencies={"1"}),
+        Task("4", "blocked", dependencies={"3"}),
+        Task("5", "free"),
+    ]
+
+    assert keys(sort_tasks_by_roi(tasks)) == ["5", "1", "2", "3", "4"]
+
+
+@st.composite
+def dag(draw):
+    count = draw(st.integers(min_value=1, max_value=30))
+    return [
+        Task(
+            str(i),
+            "task",
+            value=draw(st.sampled_from(Value)),
+            effort=draw(st.sampled_from(Effort)),
+            dependencies=draw(st.sets(st.integers(1, i - 1).map(str))) if i > 1 else (),
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+@hypothesis.given(tasks=dag())
+def test_tasks_come_after_their_dependencies(tasks):
+    position = {key: i for i, key in enumerate(keys(sort_tasks_by_roi(tasks)))}
+
+    assert len(position) == len(tasks)
+    for task in tasks:
+        assert all(position[dep] < position[task.key] for dep in task.dependencies)
+
+
+@st.composite
+def graph(draw):
+    count = draw(st.integers(min_value=1, max_value=30))
+    # tasks may depend on any other, or one not in the graph, so there are
+    # cycles, tasks stuck behind them and dependencies left out
+    return [
+        Task(
+            str(i),
+            "task",
+            value=draw(st.sampled_from(Value)),
+            effort=draw(st.sampled_from(Effort)),
+            dependencies=draw(st.sets(st.integers(1, count + 1).map(str), max_size=3)),
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+@hypothesis.given(tasks=graph())
+def test_numpy_builds_and_scores_graphs_alike(tasks):
+    pytest.importorskip("numpy")
+
+    vectorized = DependencyGraph(tasks)
+    with patch.object(dependencies, "numpy", None):
+        python = DependencyGraph(tasks)
+        order = python.topological_order()
+        roi = list(python.subtree_roi(order))
+
+    assert vectorized.offsets == python.offsets
+    assert vectorized.dependents == python.dependents
+    assert vectorized.in_degree == python.in_degree
+    assert vectorized.topological_order() == order
+    assert list(vectorized.subtree_roi(order)) == roi
+
+
+@pytest.fixture
+def chain(tmp_path):
+    path = tmp_path / "tsktsk"
+    path.touch()
+    repo = FileRepository(path)
+    for i in range(1, 6):
+        deps = {str(i - 1)} if i > 1 else set()
+        repo.add(Category.NEW, Value.MEDIUM, Effort.MEDIUM, f"task {i}", deps)
+    return repo
+
+
+def test_index_rejects_cycles_through_other_tasks(chain):
+    index = DependencyIndex(chain)
+
+    with pytest.raises(TaskError):
+        index.add("1", "5")
+    with pytest.raises(TaskError):
+        index.add("3", "3")
+    index.add("5", "1")
+
+
+def test_index_follows_added_and_removed_dependencies(chain):
+    index = DependencyIndex(chain)
+
+    index.remove("3", "2")
+    index.add("1", "5")
+
+    with pytest.raises(TaskError):
+        index.add("3", "1")
+    index.remove("1", "5")
+    index.add("3", "1")
+
+
+def test_index_loads_every_dependency_once(chain, monkeypatch):
+    searches = []
+    get_many = chain.get_many
+    monkeypatch.setattr(chain, "get_many", lambda k: searches.append(k) or get_many(k))
+
+    with pytest.raises(TaskError):
+        DependencyIndex(chain).add("1", "5")
+    assert not searches
+
+
+@pytest.mark.parametrize("storage", ["file", "journal", "sharded", "sqlite"])
+def test_dependencies_are_kept_current_as_tasks_change(tmp_path, storage):
+    path = tmp_path / "tsktsk"
+    if storage == "sqlite":
+        repo = SqliteRepository.create(path)
+    elif storage == "sharded":
+        repo = ShardedFileRepository.create(path)
+    else:
+        path.touch()
+        if storage == "journal":
+            path.with_name("tsktsk.journal").touch()
+        repo = FileRepository(path)
+
+    repo.add(Category.NEW, Value.MEDIUM, Effort.MEDIUM, "first", set())
+    assert repo.all_dependencies() == {"1": set()}
+
+    snapshots = []
+    if storage != "sqlite":
+        write = repo.dependency_log.write
+        repo.dependency_log.write = lambda *args: snapshots.append(args) or write(*args)
+
+    repo.add(Category.NEW, Value.MEDIUM, Effort.MEDIUM, "second", {"1"})
+    repo.add_many([Task("7", "third", dependencies={"1"})])
+    with repo.batch(["1", "2"]) as tasks:
+        tasks["1"].done = date(2020, 5, 17)
+        tasks["2"].dependencies = set()
+    if hasattr(repo, "archive"):
+        repo.archive()
+    with repo.task("1") as task:
+        task.dependencies = {"3"}
+
+    assert repo.all_dependencies() == {"1": {"3"}, "2": set(), "3": {"1"}}
+    assert not snapshots
+
+
+@pytest.mark.parametrize("storage", ["file", "sharded"])
+def test_dependencies_are_read_again_after_other_changes(tmp_path, storage):
+    path = tmp_path / "tsktsk"
+    if storage == "sharded":
+        repo = ShardedFileRepository.create(path, [Task("1", "first")])
+        shard = path / "tasks" / "0.yaml"
+    else:
+        path.write_text("'1': {key: '1', message: first}\n")
+        repo = FileRepository(path)
+        shard = path
+    assert repo.all_dependencies() == {"1": set()}
+
+    # written by hand, without updating the dependency log
+    shard.write_text(
+        "'1': {key: '1', message: first}\n"
+        "'2': {key: '2', message: second, dependencies: ['1']}\n"
+    )
+
+    assert repo.all_dependencies() == {"1": set(), "2": {"1"}}
+
+
+@pytest.mark.parametrize("storage", ["file", "sqlite", "sharded"])
+def test_order_is_read_back_until_tasks_change(tmp_path, monkeypatch, storage):
+    path = tmp_path / "tsktsk"
+    if storage == "sqlite":
+        repo = SqliteRepository.create(path)
+    elif storage == "sharded":
+        repo = ShardedFileRepository.create(path)
+    else:
+        path.touch()
+        repo = FileRepository(path)
+
+    repo.add(Category.NEW, Value.MEDIUM, Effort.MEDIUM, "first", set())
+    repo.add(Category.NEW, Value.HIGH, Effort.MEDIUM, "second", set())
+    assert keys(ordered_tasks(repo)) == ["2", "1"]
+
+    sorts = []
+    monkeypatch.setattr(
+        dependencies, "sort_tasks_by_roi", lambda r: sorts.append(r) or []
+    )
+    assert keys(ordered_tasks(repo)) == ["2", "1"]
+    assert not sorts
+
+    with repo.task("1") as t:
+        t.value = Value.HIGH
+    assert not keys(ordered_tasks(repo))
+    assert sorts == [repo]
+    assert not list(tmp_path.rglob("*order*"))
+
+
+def test_sqlite_order_is_read_back_by_another_process(tmp_path, monkeypatch):
+    path = tmp_path / "tsktsk.sqlite"
+    repo = SqliteRepository.create(path)
+    repo.add(Category.NEW, Value.MEDIUM, Effort.MEDIUM, "first", set())
+    repo.add(Category.NEW, Value.HIGH, Effort.MEDIUM, "second", set())
+    assert keys(ordered_tasks(SqliteRepository(path))) == ["2", "1"]
+
+    sorts = []
+    monkeypatch.setattr(
+        dependencies, "sort_tasks_by_roi", lambda r: sorts.append(r) or []
+    )
+    assert keys(ordered_tasks(SqliteRepository(path))) == ["2", "1"]
+    assert not sorts
@@ -3,9 +3,10 @@ import textwrap
 
 import hypothesis
 import hypothesis.strategies as st
+import pytest
 
 from tsktsk.commands.base import describe_task
-from tsktsk.task import Task
+from tsktsk.task import Task, TaskError
 
 
 @st.composite
@@ -28,3 +29,25 @@ def test_str_contains_task_info(task):
     assert task.key in output
     assert textwrap.shorten(task.message, width=50) in output
     assert len(output) < 80
+
+
+def test_tasks_are_slotted():
+    task = Task(key="1", message="Task", dependencies={"2"})
+
+    assert not hasattr(task, "__dict__")
+    assert task.dependencies == {"2"}
+    assert task == Task(key="1", message="Task", dependencies=frozenset({"2"}))
+
+
+def test_dependencies_can_be_changed():
+    task = Task(key="1", message="Task")
+
+    task.add_dependency(Task(key="2", message="Other"))
+    assert task.dependencies == {"2"}
+
+    with pytest.raises(TaskError):
+        Task(key="2", message="Other", dependencies={"1"}).add_dependency(task)
+
+    task.remove_dependency(Task(key="2", message="Other"))
+    task.remove_dependency(Task(key="3", message="Missing"))
+    assert task.dependencies == set()
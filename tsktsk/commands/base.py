@@ -1,15 +1,29 @@
+import itertools
 import textwrap
 from datetime import date
 from enum import Enum
-from typing import Any, Callable, Iterable, NoReturn, Optional, Set, Type, TypeVar
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NoReturn,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
 import click
 
 import tsktsk
 from tsktsk.config import Config
-from tsktsk.dependencies import sort_tasks_by_roi
+from tsktsk.dependencies import DependencyIndex, ordered_tasks
 from tsktsk.eta import sequential_eta
-from tsktsk.repository import Repository
+from tsktsk.repository import BatchError, ConcurrentModificationError, Repository
 from tsktsk.repository.discovery import discover_repository
 from tsktsk.task import Category, Effort, Task, TaskError, Value
 
@@ -132,6 +146,60 @@ def add(
     click.echo(describe_task(task))
 
 
+def change_tasks(
+    keys: Sequence[str], change: Callable[[Task], None], error: str = ""
+) -> Tuple[List[Task], Dict[str, str]]:
+    """
+    Apply change to the tasks with keys in one batch, so they are loaded
+    and saved together. Returns the changed tasks, and a message for each
+    task that could not be changed, which does not stop the others.
+    """
+    failures: Dict[str, str] = {}
+    changed: Dict[str, Task] = {}
+
+    try:
+        with tasks().batch(keys) as batch:
+            for key, task in batch.items():
+                try:
+                    change(task)
+                    changed[key] = task
+                except TaskError:
+                    failures[key] = error
+    except BatchError as e:
+        for key, failure in e.failures.items():
+            changed.pop(key, None)
+            failures[key] = failure_message(failure)
+
+    return [changed[key] for key in keys if key in changed], failures
+
+
+def failure_message(failure: Exception) -> str:
+    if isinstance(failure, KeyError):
+        return NONEXISTENT
+    if isinstance(failure, ConcurrentModificationError):
+        return "Task was changed by someone else, try again"
+    return str(failure)
+
+
+NONEXISTENT = "Nonexistent task"
+
+
+def report_failures(keys: Sequence[str], failures: Dict[str, str]) -> None:
+    if not failures:
+        return
+
+    missing = [key for key in keys if failures.get(key) == NONEXISTENT]
+    if missing:
+        click.echo(f"Nonexistent task(s): {', '.join(missing)}", err=True)
+
+    for key in keys:
+        if key in failures and key not in missing:
+            prefix = f"{key}: " if len(keys) > 1 else ""
+            click.echo(f"{prefix}{failures[key]}", err=True)
+
+    click.get_current_context().exit(1)
+
+
 @root.command()
 @enum_option(Category, "--category", help="Category of this task.")
 @enum_option(Value, "--value", help="Value gained by completing this task.")
@@ -146,12 +214,19 @@ def edit(
     effort: Optional[Effort],
     dep: Iterable[str],
     rm_dep: Iterable[str],
-    key: Optional[str],
+    key: str,
     message: Optional[str],
 ) -> None:
-    "Edit an existing task. KEY specifies which task."
+    """
+    Edit existing tasks. KEY specifies which task, or several separated by
+    commas.
+    """
 
-    with tasks().task(key) as t:
+    keys = tuple(dict.fromkeys(key.split(",")))
+    dependencies = find_dependencies(add=set(dep), remove=set(rm_dep))
+    index = DependencyIndex(tasks())
+
+    def change(t: Task) -> None:
         if category:
             t.category = category
 
@@ -165,73 +240,114 @@ def edit(
             t.message = " ".join(message)
 
         if dep or rm_dep:
-            edit_dependencies(t, add=set(dep), remove=set(rm_dep))
+            edit_dependencies(
+                t, dependencies, add=set(dep), remove=set(rm_dep), index=index
+            )
+
+    changed, failures = change_tasks(keys, change)
+
+    for t in changed:
+        click.echo(describe_task(t))
 
-    click.echo(describe_task(t))
+    report_failures(keys, failures)
 
 
-def edit_dependencies(task: Task, add: Set[str], remove: Set[str]):
+def find_dependencies(add: Set[str], remove: Set[str]) -> Dict[str, Task]:
+    if not add and not remove:
+        return {}
+
     if not add.isdisjoint(remove):
         fail("Dependency cannot be added and removed simultaneously")
 
-    for dependency in tasks():
-        if dependency.key in add:
-            try:
-                task.add_dependency(dependency)
-            except TaskError:
-                fail("Circular dependencies are not allowed")
-            add.remove(dependency.key)
-        elif dependency.key in remove:
-            task.remove_dependency(dependency)
-            remove.remove(dependency.key)
+    dependencies = tasks().get_many(add | remove)
+
+    missing = (add | remove).difference(dependencies)
+    if missing:
+        fail(f"Nonexistent task(s): {', '.join(missing)}")
 
-    if add or remove:
-        fail(f"Nonexistent task(s): {', '.join(add | remove)}")
+    return dependencies
+
+
+def edit_dependencies(
+    task: Task,
+    dependencies: Dict[str, Task],
+    add: Set[str],
+    remove: Set[str],
+    index: DependencyIndex,
+):
+    for key in remove:
+        task.remove_dependency(dependencies[key])
+        index.remove(task.key, key)
+
+    for key in add:
+        try:
+            index.add(task.key, key)
+            task.add_dependency(dependencies[key])
+        except TaskError:
+            fail("Circular dependencies are not allowed")
 
 
 @root.command()
 @click.option(
     "--estimates/--no-estimates", default=False, help="Show completion date estimates."
 )
-def list(estimates: bool) -> None:
+@click.option("--limit", type=int, default=None, help="Show at most this many tasks.")
+@click.option("--offset", type=int, default=0, help="Skip this many tasks first.")
+def list(estimates: bool, limit: Optional[int], offset: int) -> None:
     "List tasks to be done, with highest value:effort ratio first."
 
+    if offset < 0 or (limit is not None and limit < 0):
+        fail("Limit and offset cannot be negative")
+
     repo = tasks()
-    sorted_tasks = sort_tasks_by_roi(repo)
+    sorted_tasks = ordered_tasks(repo)
 
-    if not sorted_tasks:
+    # only an empty repository is reported, not an empty window of one
+    first = next(sorted_tasks, None)
+    if first is None:
         click.echo("No tasks", err=True)
         return
+    sorted_tasks = itertools.chain([first], sorted_tasks)
 
-    for task, eta in sequential_eta(repo, sorted_tasks):
-        click.echo(describe_task(task, eta if estimates else None))
+    # estimates count the effort of every task before, so skipped ones too
+    listed: Iterable[Tuple[Task, Optional[date]]] = (
+        sequential_eta(repo, sorted_tasks)
+        if estimates
+        else ((task, None) for task in sorted_tasks)
+    )
+    stop = offset + limit if limit is not None else None
+
+    for task, eta in itertools.islice(listed, offset, stop):
+        click.echo(describe_task(task, eta))
 
 
 @root.command()
-@click.argument("key", nargs=1)
-def done(key: str) -> None:
-    "Mark a task as done. KEY specifies which task."
+@click.argument("keys", nargs=-1, required=True)
+def done(keys: Tuple[str, ...]) -> None:
+    "Mark tasks as done. KEYS specifies which tasks."
 
-    try:
-        with tasks().task(key) as t:
-            t.mark_done()
-    except TaskError:
-        fail("Task is already done")
+    keys = tuple(dict.fromkeys(keys))
+    changed, failures = change_tasks(keys, Task.mark_done, "Task is already done")
 
-    click.echo("Marked as done:", err=True)
-    click.echo(describe_task(t))
+    if changed:
+        click.echo("Marked as done:", err=True)
+    for t in changed:
+        click.echo(describe_task(t))
+
+    report_failures(keys, failures)
 
 
 @root.command()
-@click.argument("key", nargs=1)
-def undone(key: str) -> None:
-    "Mark a task as undone. KEY specifies which task."
+@click.argument("keys", nargs=-1, required=True)
+def undone(keys: Tuple[str, ...]) -> None:
+    "Mark tasks as undone. KEYS specifies which tasks."
 
-    try:
-        with tasks().task(key) as t:
-            t.mark_undone()
-    except TaskError:
-        fail("Task is not done")
+    keys = tuple(dict.fromkeys(keys))
+    changed, failures = change_tasks(keys, Task.mark_undone, "Task is not done")
+
+    if changed:
+        click.echo("Marked as undone:", err=True)
+    for t in changed:
+        click.echo(describe_task(t))
 
-    click.echo("Marked as undone:", err=True)
-    click.echo(describe_task(t))
+    report_failures(keys, failures)
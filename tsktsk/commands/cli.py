@@ -1,34 +1,110 @@
 import subprocess
+from pathlib import Path
 
 import click
 
 import tsktsk.repository as repository
-from tsktsk.commands.base import fail, root, tasks
+from tsktsk.commands.base import enum_option, fail, failure_message, root, tasks
+from tsktsk.repository import ConcurrentModificationError, GithubRepository, Storage
+from tsktsk.repository.github import MAX_WORKERS
+from tsktsk.repository.transfer import (
+    export_tasks,
+    import_tasks,
+    read_tasks,
+    write_tasks,
+)
 
 
 @root.command()
-def init() -> None:
+@enum_option(
+    Storage,
+    "--storage",
+    default=Storage.DEFAULT,
+    help="How tasks are stored.",
+)
+def init(storage: Storage) -> None:
     "Initialize a new tsktsk repository."
 
     try:
-        repository.create()
+        repository.create(storage)
         click.echo("tsktsk initialized.", err=True)
     except FileExistsError:
         fail("tsktsk already initialized.")
 
 
+@root.command()
+@enum_option(
+    Storage,
+    "--storage",
+    required=True,
+    help="How tasks should be stored.",
+)
+def migrate(storage: Storage) -> None:
+    "Move tasks in a .tsktsk file to another storage."
+
+    try:
+        repository.migrate(storage)
+        click.echo("tsktsk migrated.", err=True)
+    except FileNotFoundError:
+        fail("No .tsktsk file to migrate.")
+
+
+@root.command("export")
+@click.argument("file", type=click.File("w"), default="-")
+def export_command(file) -> None:
+    "Write every task to FILE, or stdout, as JSON lines."
+
+    exported = write_tasks(export_tasks(tasks()), file)
+    click.echo(f"Exported {exported} task(s).", err=True)
+
+
+@root.command("import")
+@click.argument("file", type=click.Path(exists=True, dir_okay=False))
+def import_command(file: str) -> None:
+    """
+    Add the tasks exported to FILE. Tasks are given new keys, and their
+    dependencies changed to match. An interrupted import continues where
+    it stopped when run again.
+    """
+
+    repo = tasks()
+    # github creates issues a few at a time, local repositories all at once
+    workers = MAX_WORKERS if isinstance(repo, GithubRepository) else 1
+
+    with open(file, mode="r") as f:
+        imported = import_tasks(
+            repo, read_tasks(f), Path(f"{file}.checkpoint"), workers
+        )
+    click.echo(f"Imported {len(imported)} task(s).", err=True)
+
+
+@root.command()
+def archive() -> None:
+    "Move done tasks out of the task list, to speed up listing."
+
+    repo = tasks()
+    if not hasattr(repo, "archive"):
+        fail("Archiving is not supported by this repository.")
+
+    archived = repo.archive()
+    click.echo(f"Archived {archived} task(s).", err=True)
+
+
 @root.command()
 @click.argument("key", nargs=1)
 def commit(key: str) -> None:
     "Commit changes using message from task. KEY specifies which task."
 
-    with tasks().task(key) as t:
-        output = subprocess.run(
-            ["git", "commit", "-m", f"{t.category.value}: {t.message}"],
-            text=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-        )
+    try:
+        with tasks().task(key) as t:
+            output = subprocess.run(
+                ["git", "commit", "-m", f"{t.category.value}: {t.message}"],
+                text=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+            )
 
-        callback = fail if output.returncode else click.echo
-        callback(output.stdout)
+            callback = fail if output.returncode else click.echo
+            callback(output.stdout)
+    except (KeyError, ConcurrentModificationError) as e:
+        fail(failure_message(e))
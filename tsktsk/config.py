@@ -1,5 +1,6 @@
 import os
 from enum import Enum
+from pathlib import Path
 from typing import Dict, Iterable, List, Optional
 
 
@@ -8,12 +9,21 @@ class Env(Enum):
     GITHUB_TOKEN = "TSKTSK_GITHUB_TOKEN"
     GITHUB_APP_CLIENT_ID = "TSKTSK_GITHUB_CLIENT_ID"
     GITHUB_SINGLE_REPO = "TSKTSK_GITHUB_REPO"
+    GITHUB_ENGINE = "TSKTSK_GITHUB_ENGINE"
     DB_PATH = "TSKTSK_DB_PATH"
+    CACHE_PATH = "TSKTSK_CACHE_PATH"
+    HTTP_POOL_SIZE = "TSKTSK_HTTP_POOL_SIZE"
+    HTTP_KEEPALIVE = "TSKTSK_HTTP_KEEPALIVE"
 
     def get(self, default: Optional[str] = None) -> Optional[str]:
         return os.environ.get(self.value, default)
 
 
+def cache_path() -> Path:
+    path = Env.CACHE_PATH.get()
+    return Path(path) if path else Path.home() / ".cache" / "tsktsk"
+
+
 def split_tuple_list(var: str) -> Iterable[List[str]]:
     return (s.split(":") for s in os.environ.get(var, "").split(","))
 
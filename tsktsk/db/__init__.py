@@ -15,15 +15,18 @@ def get_path():
 
 
 @contextlib.contextmanager
-def connection() -> Iterator[sqlite3.Connection]:
-    with contextlib.closing(sqlite3.connect(get_path())) as conn:
+def connection(path: Optional[str] = None) -> Iterator[sqlite3.Connection]:
+    with contextlib.closing(sqlite3.connect(path or get_path())) as conn:
         conn.row_factory = sqlite3.Row
         with conn:
             yield conn
 
 
-def apply_migrations(path: Optional[str] = None):
+def apply_migrations(path: Optional[str] = None, migrations: str = "migrations"):
     backend = get_backend(f"sqlite:///{path or get_path()}")
-    migrations = read_migrations(resource_filename("tsktsk.resources", "migrations"))
+    migrations = read_migrations(resource_filename("tsktsk.resources", migrations))
+    # checked without the lock first, which would write to the database
+    if not backend.to_apply(migrations):
+        return
     with backend.lock():
         backend.apply_migrations(backend.to_apply(migrations))
@@ -0,0 +1,76 @@
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from tsktsk.db import connection
+
+JsonObject = Dict[str, Any]
+
+
+def last_synced(repo: str) -> Optional[str]:
+    with connection() as conn:
+        row = conn.execute(
+            "SELECT synced_at FROM github_syncs WHERE repo = ?", (repo,)
+        ).fetchone()
+        return row[0] if row is not None else None
+
+
+def merge(
+    repo: str, issues: Iterable[JsonObject], synced_at: Optional[str] = None
+) -> None:
+    """
+    Store issues fetched from github, replacing older copies of them.
+    synced_at, or if not given the latest updated_at seen, is recorded to
+    fetch only newer changes next time.
+
+    issues is read in full before writing, so the database is not locked
+    while they are fetched.
+    """
+    issues = list(issues)
+    if synced_at is None and issues:
+        synced_at = max(issue["updated_at"] for issue in issues)
+
+    with connection() as conn:
+        for issue in issues:
+            conn.execute(
+                "INSERT OR REPLACE INTO github_issues(repo, number, state, updated_at, issue) VALUES (?, ?, ?, ?, ?)",
+                (
+                    repo,
+                    issue["number"],
+                    issue["state"],
+                    issue["updated_at"],
+                    json.dumps(issue),
+                ),
+            )
+
+        if synced_at:
+            conn.execute(
+                "INSERT OR REPLACE INTO github_syncs(repo, synced_at) VALUES (?, max(?,"
+                " coalesce((SELECT synced_at FROM github_syncs WHERE repo = ?), '')))",
+                (repo, synced_at, repo),
+            )
+
+
+def find(
+    repo: str, state: str = "all", since: Optional[str] = None
+) -> Iterator[JsonObject]:
+    with connection() as conn:
+        rows = conn.execute(
+            "SELECT issue FROM github_issues WHERE repo = ?"
+            " AND (? = 'all' OR state = ?) AND (? IS NULL OR updated_at >= ?)"
+            " ORDER BY number DESC",
+            (repo, state, state, since, since),
+        ).fetchall()
+    return (json.loads(row[0]) for row in rows)
+
+
+def find_numbers(repo: str, numbers: List[int]) -> Iterator[JsonObject]:
+    if not numbers:
+        return iter(())
+
+    with connection() as conn:
+        rows = conn.execute(
+            "SELECT issue FROM github_issues WHERE repo = ?"
+            f" AND number IN ({', '.join('?' * len(numbers))})",
+            (repo, *numbers),
+        ).fetchall()
+    return (json.loads(row[0]) for row in rows)
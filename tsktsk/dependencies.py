@@ -1,72 +1,302 @@
-from __future__ import annotations
-
-import dataclasses
 import heapq
-from typing import Dict, List
+import json
+from array import array
+from itertools import accumulate
+from pathlib import Path
+from typing import (
+    AbstractSet,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+)
+
+try:
+    import numpy
+except ImportError:
+    # the graph is built and scored in pure python, more slowly
+    numpy = None
 
 from tsktsk.repository import Repository
-from tsktsk.task import Task
+from tsktsk.repository.file import write_atomic
+from tsktsk.repository.transfer import task_from_json, task_to_json
+from tsktsk.task import Task, TaskError
 
+Arrays = Tuple[array, array, array]
 
-@dataclasses.dataclass
-class GraphNode:
-    task: Task
-    dependencies: List[GraphNode]
-    dependents: List[GraphNode]
 
+def build_python(size: int, sources: array, targets: array) -> Arrays:
+    counts = [0] * (size + 1)
+    in_degree = array("i", [0]) * size
+    for source, target in zip(sources, targets):
+        counts[source + 1] += 1
+        in_degree[target] += 1
 
-def max_sum_roi(node: GraphNode):
-    task = node.task
-    values_sum = sum(
-        (dep.task.value_points for dep in node.dependents), task.value_points
-    )
-    efforts_sum = sum(
-        (dep.task.effort_points for dep in node.dependents), task.effort_points
+    offsets = array("i", accumulate(counts))
+    cursor = list(offsets)
+    dependents = array("i", [0]) * len(sources)
+    for source, target in zip(sources, targets):
+        dependents[cursor[source]] = target
+        cursor[source] += 1
+
+    return offsets, dependents, in_degree
+
+
+def build_numpy(size: int, sources: array, targets: array) -> Arrays:
+    src = numpy.frombuffer(sources, dtype=numpy.intc)
+    dst = numpy.frombuffer(targets, dtype=numpy.intc)
+
+    counts = numpy.bincount(src, minlength=size)
+    offsets = numpy.concatenate(([0], numpy.cumsum(counts)))
+    dependents = dst[numpy.argsort(src, kind="stable")]
+    in_degree = numpy.bincount(dst, minlength=size)
+
+    return tuple(
+        array("i", a.astype(numpy.intc).tobytes())
+        for a in (offsets, dependents, in_degree)
     )
-    return max(values_sum / efforts_sum, task.value_points / task.effort_points)
 
 
-def build_graph(tasks: Dict[str, Task]) -> List[GraphNode]:
-    nodes = {}
-    roots = []
+class DependencyGraph:
+    """
+    Tasks numbered in the order given, with the dependents of task i at
+    dependents[offsets[i]:offsets[i + 1]], as in a compressed sparse row
+    matrix, and the number of its dependencies at in_degree[i].
+    Dependencies on tasks not in the graph are left out.
+    """
+
+    def __init__(self, tasks: Iterable[Task]):
+        self.tasks = list(tasks)
+        ids = {task.key: i for i, task in enumerate(self.tasks)}
+
+        sources, targets = array("i"), array("i")
+        for i, task in enumerate(self.tasks):
+            for dep in task.dependencies:
+                source = ids.get(dep)
+                if source is not None:
+                    sources.append(source)
+                    targets.append(i)
 
-    def get_node(task):
-        node = nodes.get(task.key)
-        if not node:
-            node = nodes[task.key] = GraphNode(task, [], [])
-        return node
+        build = build_numpy if numpy else build_python
+        self.offsets, self.dependents, self.in_degree = build(
+            len(self.tasks), sources, targets
+        )
 
-    for node in map(get_node, tasks.values()):
-        for dep in node.task.dependencies:
-            try:
-                dependency_node = get_node(tasks[dep])
-            except KeyError:
-                continue
-            node.dependencies.append(dependency_node)
-            dependency_node.dependents.append(node)
+    def topological_order(self) -> List[int]:
+        """
+        Tasks ordered so each comes after its dependencies. Tasks in a cycle,
+        or depending on one, never have their dependencies done and are left
+        out.
+        """
+        offsets, dependents = self.offsets, self.dependents
+        remaining = array("i", self.in_degree)
+        order = [i for i, count in enumerate(remaining) if not count]
 
-        if not node.dependencies:
-            roots.append(node)
+        for i in order:
+            for dependent in dependents[offsets[i] : offsets[i + 1]]:
+                remaining[dependent] -= 1
+                if not remaining[dependent]:
+                    order.append(dependent)
 
-    return roots
+        return order
 
+    def subtree_roi(self, order: List[int]) -> Sequence[float]:
+        """
+        The value:effort ratio of each task together with everything it
+        unblocks, computed in one pass over the tasks in reverse topological
+        order, so each task's dependents are done before it. A task unblocked
+        by several others is shared between them, split by its number of
+        dependencies, so it is counted once overall.
+        """
+        offsets, dependents, in_degree = self.offsets, self.dependents, self.in_degree
+        own_values = array("d", (t.value_points for t in self.tasks))
+        own_efforts = array("d", (t.effort_points for t in self.tasks))
 
-def sort_tasks_by_roi(repo: Repository):
-    roots = build_graph({task.key: task for task in repo})
+        # tasks stuck behind a cycle are never reached, and add nothing
+        values = array("d", [0.0]) * len(self.tasks)
+        efforts = array("d", [0.0]) * len(self.tasks)
 
-    sort_key = lambda node: (-max_sum_roi(node), node.task.key)
-    available_nodes = [(sort_key(node), node) for node in roots]
-    heapq.heapify(available_nodes)
+        for i in reversed(order):
+            value, effort = own_values[i], own_efforts[i]
+            for dependent in dependents[offsets[i] : offsets[i + 1]]:
+                share = in_degree[dependent]
+                value += values[dependent] / share
+                effort += efforts[dependent] / share
+            values[i], efforts[i] = value, effort
 
-    output = []
-    while available_nodes:
-        _, node = heapq.heappop(available_nodes)
-        output.append(node.task)
-        for dependent_node in node.dependents:
-            dependent_node.dependencies.remove(node)
-            if not dependent_node.dependencies:
+        if numpy:
+            ordered = numpy.array(order, dtype=numpy.intp)
+            roi = numpy.zeros(len(self.tasks))
+            roi[ordered] = numpy.maximum(
+                numpy.frombuffer(values)[ordered] / numpy.frombuffer(efforts)[ordered],
+                numpy.frombuffer(own_values)[ordered]
+                / numpy.frombuffer(own_efforts)[ordered],
+            )
+            return roi.tolist()
+
+        roi = array("d", [0.0]) * len(self.tasks)
+        for i in order:
+            roi[i] = max(values[i] / efforts[i], own_values[i] / own_efforts[i])
+        return roi
+
+
+def sort_tasks_by_roi(repo: Repository) -> Iterator[Task]:
+    """
+    Tasks are yielded as they are taken off the heap, so taking the first
+    few does not order the rest.
+    """
+    graph = DependencyGraph({task.key: task for task in repo}.values())
+    tasks, offsets, dependents = graph.tasks, graph.offsets, graph.dependents
+
+    order = graph.topological_order()
+    roi = graph.subtree_roi(order)
+
+    remaining = array("i", graph.in_degree)
+    available = [(-roi[i], tasks[i].key, i) for i in order if not remaining[i]]
+    heapq.heapify(available)
+
+    while available:
+        _, _, i = heapq.heappop(available)
+        yield tasks[i]
+        for dependent in dependents[offsets[i] : offsets[i + 1]]:
+            remaining[dependent] -= 1
+            if not remaining[dependent]:
                 heapq.heappush(
-                    available_nodes, (sort_key(dependent_node), dependent_node)
+                    available, (-roi[dependent], tasks[dependent].key, dependent)
                 )
 
-    return output
+    # tasks caught in a cycle can never be unblocked, so are listed last
+    if len(order) < len(tasks):
+        listed = set(order)
+        yield from sorted(
+            (t for i, t in enumerate(tasks) if i not in listed),
+            key=lambda t: t.key,
+        )
+
+
+class OrderCache:
+    """
+    The tasks in the order sort_tasks_by_roi last gave for a repository, as
+    JSON lines after a first line holding the version of the repository
+    they were sorted at. Any change to the repository changes its version,
+    so an order is only read back while nothing has changed.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    @staticmethod
+    def header(version: Any) -> str:
+        return json.dumps({"version": version})
+
+    def read(self, version: Any) -> Optional[Iterator[Task]]:
+        try:
+            f = self.path.open(mode="r")
+        except FileNotFoundError:
+            return None
+
+        if f.readline().rstrip("\n") != self.header(version):
+            f.close()
+            return None
+        return self.tasks(f)
+
+    @staticmethod
+    def tasks(f: TextIO) -> Iterator[Task]:
+        # read as they are asked for, so listing the first few reads only those
+        with f:
+            for line in f:
+                yield task_from_json(json.loads(line))
+
+    def write(self, version: Any, tasks: List[Task]) -> None:
+        lines = [self.header(version), *(json.dumps(task_to_json(t)) for t in tasks)]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(self.path, "".join(f"{line}\n" for line in lines))
+
+
+def ordered_tasks(repo: Repository) -> Iterator[Task]:
+    """
+    The tasks of repo sorted by roi, read back from its order cache when it
+    has one and nothing changed since the tasks were last sorted.
+    """
+    version = repo.version() if hasattr(repo, "order_path") else None
+    if version is None:
+        return sort_tasks_by_roi(repo)
+
+    cache = OrderCache(repo.order_path)
+    cached = cache.read(version)
+    if cached is not None:
+        return cached
+
+    # the whole order is cached, so later listings can stop early
+    tasks = list(sort_tasks_by_roi(repo))
+    cache.write(version, tasks)
+    return iter(tasks)
+
+
+class DependencyIndex:
+    """
+    The dependencies of tasks, kept up to date as dependencies are added and
+    removed.
+
+    Local repositories give the dependencies of every task at once, kept
+    current as tasks are written. Others are loaded a level at a time as
+    searches reach them, so a search only ever loads the tasks it passes
+    through.
+    """
+
+    def __init__(self, repo: Repository):
+        self.repo = repo
+        self.dependencies: Dict[str, AbstractSet[str]] = {}
+        self.complete = False
+
+    def load(self, keys: Iterable[str]) -> None:
+        if self.complete:
+            return
+
+        if hasattr(self.repo, "all_dependencies"):
+            self.dependencies = dict(self.repo.all_dependencies())
+            self.complete = True
+            return
+
+        missing = [key for key in keys if key not in self.dependencies]
+        if not missing:
+            return
+
+        found = self.repo.get_many(missing)
+        for key in missing:
+            self.dependencies[key] = found[key].dependencies if key in found else ()
+
+    def depends_on(self, key: str, dependency: str) -> bool:
+        """
+        Whether key depends on dependency, directly or through other tasks.
+        """
+        seen = {key}
+        level = [key]
+        while level:
+            self.load(level)
+            next_level = []
+            for k in level:
+                for dep in self.dependencies.get(k, ()):
+                    if dep == dependency:
+                        return True
+                    if dep not in seen:
+                        seen.add(dep)
+                        next_level.append(dep)
+            level = next_level
+        return False
+
+    def add(self, key: str, dependency: str) -> None:
+        if key == dependency or self.depends_on(dependency, key):
+            raise TaskError("circular dependencies")
+
+        self.load([key])
+        self.dependencies[key] = frozenset(self.dependencies[key]) | {dependency}
+
+    def remove(self, key: str, dependency: str) -> None:
+        self.load([key])
+        self.dependencies[key] = frozenset(self.dependencies[key]) - {dependency}
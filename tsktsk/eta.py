@@ -1,14 +1,18 @@
 from datetime import date, timedelta
 from itertools import repeat
-from typing import Iterable, List, Optional, Tuple
+from typing import Iterable, Iterator, Optional, Tuple
 
 from tsktsk.repository import Repository
 from tsktsk.task import Task
 
 
 def sequential_eta(
-    repo: Repository, tasks: List[Task]
-) -> Iterable[Tuple[Task, Optional[date]]]:
+    repo: Repository, tasks: Iterable[Task]
+) -> Iterator[Tuple[Task, Optional[date]]]:
+    """
+    Estimates are made as they are asked for, taking no more of tasks than
+    needed.
+    """
     velocity, remaining = estimate_velocity(repo)
     if velocity == 0:
         yield from zip(tasks, repeat(None))
@@ -1,11 +1,20 @@
+import shutil
 from datetime import date
+from enum import Enum, auto
 from pathlib import Path
-from typing import Callable, ContextManager, Iterable, List, Set
+from typing import Callable, ContextManager, Dict, Iterable, List, Set
 
 from typing_extensions import Protocol
 
-from tsktsk.repository.file import FileRepository  # noqa
+from tsktsk.repository.batch import BatchError  # noqa
+from tsktsk.repository.file import (  # noqa
+    ConcurrentModificationError,
+    FileRepository,
+    task_from_yaml,
+)
 from tsktsk.repository.github import GithubRepository  # noqa
+from tsktsk.repository.sharded import ShardedFileRepository  # noqa
+from tsktsk.repository.sqlite import SqliteRepository  # noqa
 from tsktsk.task import Category, Effort, Task, Value
 
 
@@ -22,13 +31,102 @@ class Repository(Iterable[Task], Protocol):
 
     # this is more complicated than we'd like because of the typing of @contextlib.contextmanager
     task: Callable[..., ContextManager[Task]]
+    batch: Callable[..., ContextManager[Dict[str, Task]]]
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Task]:
+        ...
 
     def tasks_done_between(self, start: date, end: date) -> List[Task]:
         ...
 
 
-def create() -> None:
-    try:
-        Path(".tsktsk").touch(exist_ok=False)
-    except FileExistsError:
+class Storage(Enum):
+    FILE = auto()
+    JOURNAL = auto()
+    SQLITE = auto()
+    SHARDED = auto()
+
+    DEFAULT = FILE
+
+
+PATH = Path(".tsktsk")
+SQLITE_PATH = Path(".tsktsk.sqlite")
+
+
+def local_repository() -> Repository:
+    if SQLITE_PATH.exists():
+        return SqliteRepository(SQLITE_PATH)
+    if PATH.is_dir():
+        return ShardedFileRepository(PATH)
+    return FileRepository(PATH)
+
+
+def create(storage: Storage = Storage.DEFAULT) -> None:
+    if PATH.exists() or SQLITE_PATH.exists():
         raise FileExistsError("Repository already exists")
+
+    if storage == Storage.SQLITE:
+        SqliteRepository.create(SQLITE_PATH)
+        return
+
+    if storage == Storage.SHARDED:
+        ShardedFileRepository.create(PATH)
+        return
+
+    PATH.touch()
+
+    if storage == Storage.JOURNAL:
+        FileRepository(PATH).journal.touch()
+
+
+def migrate(storage: Storage) -> None:
+    """
+    Move the tasks stored in a .tsktsk file to another storage.
+    When moving to sqlite or sharded storage the .tsktsk file is kept as
+    .tsktsk.bak.
+    """
+    if SQLITE_PATH.exists() or not PATH.is_file():
+        raise FileNotFoundError("No tsktsk file to migrate")
+
+    source = FileRepository(PATH)
+    tasks = source.read()
+
+    if storage == Storage.JOURNAL:
+        source.journal.touch()
+        return
+
+    if source.journal.exists():
+        source.compact(tasks)
+        source.journal.unlink()
+
+    archived = source.archived.between(date.min, date.max)
+    all_tasks = [
+        *map(task_from_yaml, tasks.values()),
+        *(t for t in archived if t.key not in tasks),
+    ]
+
+    if storage == Storage.SQLITE:
+        tmp = SQLITE_PATH.with_name(f"{SQLITE_PATH.name}.tmp")
+        if tmp.exists():
+            tmp.unlink()
+        SqliteRepository.create(tmp, all_tasks)
+        backup(source)
+        tmp.rename(SQLITE_PATH)
+
+    if storage == Storage.SHARDED:
+        tmp = PATH.with_name(f"{PATH.name}.tmp")
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        ShardedFileRepository.create(tmp, all_tasks)
+        backup(source)
+        tmp.rename(PATH)
+
+
+def backup(source: FileRepository) -> None:
+    for path in (source.path, source.archived.path):
+        if path.exists():
+            path.rename(path.with_name(f"{path.name}.bak"))
+
+    for path in (source.index_path, source.order_path, source.dependency_log.path):
+        if path.exists():
+            path.unlink()
@@ -11,6 +11,7 @@ import smalld_click
 import tsktsk.db.auth as auth_dao
 from tsktsk.config import Env
 from tsktsk.db.auth import GithubAuth
+from tsktsk.repository.sessions import PooledAdapter, shared_session
 
 
 def find_github_auth() -> Optional[GithubAuth]:
@@ -55,12 +56,18 @@ class DeviceAuthData:
     on_completed: AuthCallback
 
 
+def login_session() -> requests.Session:
+    http = requests.Session()
+    http.headers["Accept"] = "application/json"
+    http.mount("https://", PooledAdapter())
+    return http
+
+
 class GithubAuthHandler:
     def __init__(self, client_id, scope):
         self.client_id = client_id
         self.scope = scope
-        self.http = requests.Session()
-        self.http.headers["Accept"] = "application/json"
+        self.http = shared_session("https://github.com/login", login_session)
         self.pending_auth = PriorityQueue()
         self.auth_requested = Event()
         Thread(target=self.periodic_poll, daemon=True).start()
@@ -0,0 +1,52 @@
+import contextlib
+import sys
+from typing import ContextManager, Dict, Iterable, Iterator
+
+from tsktsk.task import Task
+
+
+class BatchError(Exception):
+    """
+    Raised at the end of a batch when some of its tasks could not be found
+    or saved. The other tasks in the batch are saved regardless.
+    """
+
+    def __init__(self, failures: Dict[str, Exception]):
+        super().__init__(failures)
+        self.failures = failures
+
+
+@contextlib.contextmanager
+def each_task(repo, keys: Iterable[str]) -> Iterator[Dict[str, Task]]:
+    """
+    Batch changes by entering repo.task for each key in turn, for
+    repositories that have no cheaper way to change many tasks.
+    """
+    failures: Dict[str, Exception] = {}
+    contexts: Dict[str, ContextManager[Task]] = {}
+    tasks: Dict[str, Task] = {}
+
+    for key in dict.fromkeys(keys):
+        context = repo.task(key)
+        try:
+            tasks[key] = context.__enter__()
+        except KeyError as e:
+            failures[key] = e
+            continue
+        contexts[key] = context
+
+    try:
+        yield tasks
+    except BaseException:
+        for context in contexts.values():
+            context.__exit__(*sys.exc_info())
+        raise
+
+    for key, context in contexts.items():
+        try:
+            context.__exit__(None, None, None)
+        except Exception as e:
+            failures[key] = e
+
+    if failures:
+        raise BatchError(failures)
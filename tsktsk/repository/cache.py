@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+import requests
+
+from tsktsk.repository.file import write_atomic
+
+MAX_SIZE = 64 * 1024 * 1024
+
+# Headers that describe the body, and so are kept along with it
+CACHED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Link")
+
+
+class HttpCache:
+    """
+    Bodies of GET responses stored on disk with their ETag and Last-Modified
+    headers, one file per request. Files are touched when used, and the
+    least recently used are removed once the cache grows past max_size.
+
+    The size of the cache is found once, and then kept up to date as entries
+    are written, so the directory is only scanned again when it has grown
+    too large.
+    """
+
+    def __init__(self, path: Path, max_size: int = MAX_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self.size: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def entry_path(self, request: requests.PreparedRequest) -> Path:
+        # responses differ by who asks, so the credentials are part of the key
+        key = f"{request.url} {request.headers.get('Authorization', '')}"
+        return self.path / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json"
+
+    def get(self, request: requests.PreparedRequest) -> Optional[Any]:
+        path = self.entry_path(request)
+        try:
+            with path.open(mode="r") as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            return None
+        return entry
+
+    def put(self, request: requests.PreparedRequest, response: requests.Response):
+        entry = {
+            "headers": {
+                k: response.headers[k] for k in CACHED_HEADERS if k in response.headers
+            },
+            "body": response.text,
+        }
+
+        path = self.entry_path(request)
+        try:
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+
+        # json.dumps escapes anything outside ascii, so its length is its size
+        text = json.dumps(entry)
+        self.path.mkdir(parents=True, exist_ok=True)
+        write_atomic(path, text)
+
+        with self.lock:
+            if self.size is not None:
+                self.size += len(text) - replaced
+            full = self.size is None or self.size > self.max_size
+        if full:
+            self.evict()
+
+    def count(self, hit: bool) -> None:
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def evict(self) -> None:
+        entries = []
+        for path in self.path.glob("*.json"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, path))
+
+        size = sum(size for _, size, _ in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+
+        with self.lock:
+            self.size = size
+
+
+class CachingSession(requests.Session):
+    """
+    A session that makes GET requests conditional on the cached ETag or
+    Last-Modified. A 304 Not Modified, which github does not count against
+    the rate limit, is answered with the cached body.
+    """
+
+    def __init__(self, cache: HttpCache):
+        super().__init__()
+        self.cache = cache
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any):
+        if request.method != "GET":
+            return super().send(request, **kwargs)
+
+        entry = self.cache.get(request)
+        if entry:
+            headers = entry["headers"]
+            if "ETag" in headers:
+                request.headers["If-None-Match"] = headers["ETag"]
+            if "Last-Modified" in headers:
+                request.headers["If-Modified-Since"] = headers["Last-Modified"]
+
+        response = super().send(request, **kwargs)
+
+        if entry and response.status_code == 304:
+            self.cache.count(hit=True)
+            response.status_code = 200
+            response.headers.update(entry["headers"])
+            response._content = entry["body"].encode("utf-8")
+            response.encoding = "utf-8"
+            return response
+
+        self.cache.count(hit=False)
+        if response.status_code == 200 and (
+            "ETag" in response.headers or "Last-Modified" in response.headers
+        ):
+            self.cache.put(request, response)
+
+        return response
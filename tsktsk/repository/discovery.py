@@ -1,11 +1,14 @@
-from pathlib import Path
 from typing import Optional
 
 import smalld_click
 
-from tsktsk.config import Config, Env
-from tsktsk.repository import FileRepository, GithubRepository, Repository
+from tsktsk.config import Config, Env, cache_path
+from tsktsk.repository import GithubRepository, Repository, local_repository
 from tsktsk.repository.auth import find_github_auth
+from tsktsk.repository.cache import HttpCache
+from tsktsk.repository.github import Engine
+from tsktsk.repository.mirror import MirroredGithubRepository
+from tsktsk.repository.sessions import log_connection_stats
 
 
 def discover_repository(config: Config, explicit_github: Optional[str]) -> Repository:
@@ -18,7 +21,9 @@ def discover_repository(config: Config, explicit_github: Optional[str]) -> Repos
     1. Use explicitly passed repository
     2. If Discord, use repository configured for that channel
     3. Use repository configured via env vars
-    4. Use default file repository
+    4. Use local repository, sqlite if .tsktsk.sqlite exists, otherwise .tsktsk
+
+    When used from Discord, github issues are mirrored in the bot's database.
     """
 
     github_repository = explicit_github
@@ -29,10 +34,22 @@ def discover_repository(config: Config, explicit_github: Optional[str]) -> Repos
     if not github_repository:
         github_repository = Env.GITHUB_SINGLE_REPO.get()
 
-    if github_repository:
-        return GithubRepository(github_repository, find_github_auth())
+    if not github_repository:
+        return local_repository()
+
+    # the bot keeps a mirror of issues in its database
+    if smalld_click.get_conversation():
+        github_type = MirroredGithubRepository
+        log_connection_stats()
     else:
-        return FileRepository(Path(".tsktsk"))
+        github_type = GithubRepository
+
+    engine = Engine.__members__.get(
+        (Env.GITHUB_ENGINE.get() or "").upper(), Engine.DEFAULT
+    )
+    return github_type(
+        github_repository, find_github_auth(), HttpCache(cache_path()), engine
+    )
 
 
 def github_from_channel(config: Config) -> Optional[str]:
@@ -1,43 +1,91 @@
 import contextlib
-from datetime import date, datetime
+import dataclasses
+import functools
+import hashlib
+import json
+import os
+import re
+import stat
+import tempfile
+from datetime import date
+from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, Iterator, List, Set
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+)
 
 import yaml
 
+try:
+    import fcntl
+except ImportError:
+    # no advisory locking on windows, concurrent writers may conflict
+    fcntl = None
+
+from tsktsk.config import cache_path
+from tsktsk.repository.batch import BatchError, each_task
 from tsktsk.task import Category, Effort, Task, Value
 
 YamlDict = Dict[str, Any]
 
+# libyaml is an optional part of PyYAML, use it when it was compiled in
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+Dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
+def enum_table(enum_type: Type[Enum]) -> Dict[str, Enum]:
+    table = {}
+    for name, member in enum_type.__members__.items():
+        table[name] = table[name.lower()] = member
+    return table
+
+
+CATEGORIES = enum_table(Category)
+VALUES = enum_table(Value)
+EFFORTS = enum_table(Effort)
 
+
+@functools.lru_cache(maxsize=None)
 def date_from_str(value: str) -> date:
-    return datetime.strptime(value, "%Y%m%d").date()
+    return date(int(value[:4]), int(value[4:6]), int(value[6:8]))
 
 
 def date_to_str(value: date) -> str:
     return value.strftime("%Y%m%d")
 
 
+def lookup(table: Dict[str, Enum], name: str) -> Enum:
+    try:
+        return table[name]
+    except KeyError:
+        return table[name.upper()]
+
+
 def task_from_yaml(values: YamlDict) -> Task:
     category = values.get("category")
-    if category:
-        values["category"] = Category.__members__[category.upper()]
-
     value = values.get("value")
-    if value:
-        values["value"] = Value.__members__[value.upper()]
-
     effort = values.get("effort")
-    if effort:
-        values["effort"] = Effort.__members__[effort.upper()]
-
     done = values.get("done")
-    if done:
-        values["done"] = date_from_str(done)
-
-    values["dependencies"] = set(values.get("dependencies", []))
 
-    return Task(**values)
+    return Task(
+        key=values["key"],
+        message=values["message"],
+        category=lookup(CATEGORIES, category) if category else Category.DEFAULT,
+        value=lookup(VALUES, value) if value else Value.DEFAULT,
+        effort=lookup(EFFORTS, effort) if effort else Effort.DEFAULT,
+        dependencies=frozenset(values.get("dependencies") or ()),
+        done=date_from_str(done) if done else None,
+    )
 
 
 def task_to_yaml(task: Task) -> YamlDict:
@@ -52,9 +100,355 @@ def task_to_yaml(task: Task) -> YamlDict:
     )
 
 
+def load(path: Path) -> YamlDict:
+    with path.open(mode="r") as f:
+        return yaml.load(f, Loader=Loader) or {}
+
+
+def dump(tasks: YamlDict, path: Path) -> str:
+    text = yaml.dump(tasks, Dumper=Dumper)
+    write_atomic(path, text)
+    return text
+
+
+def write_atomic(path: Path, text: str) -> None:
+    """
+    Write text to path atomically. The text is written to a temporary file
+    in the same directory which then replaces path, so readers and crashes
+    never observe a partially written file.
+    """
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        if path.exists():
+            os.chmod(tmp, stat.S_IMODE(path.stat().st_mode))
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+# A top level key of a yaml file written by dump, e.g. '12':
+YAML_KEY = re.compile(rb"^(?:'((?:[^']|'')*)'|([^\s'\"#:{\[-][^:]*)):\s*$")
+
+Index = Dict[str, Tuple[int, int]]
+
+
+def index_yaml(text: bytes) -> Optional[Index]:
+    """
+    Find the byte range of each top level task in yaml written by dump.
+    Returns None if the text is laid out differently, e.g. after hand editing.
+    """
+    if text.strip() == b"{}":
+        return {}
+
+    starts: List[Tuple[int, str]] = []
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        if line[:1] not in (b" ", b"\n"):
+            match = YAML_KEY.match(line)
+            if not match:
+                return None
+            quoted, plain = match.groups()
+            key = quoted.replace(b"''", b"'") if quoted is not None else plain
+            starts.append((offset, key.decode("utf-8")))
+        elif not starts and line.strip():
+            return None
+        offset += len(line)
+
+    ends = [start for start, _ in starts[1:]] + [offset]
+    return {key: (start, end) for (start, key), end in zip(starts, ends)}
+
+
+def cache_dir(path: Path) -> Path:
+    """
+    Where files derived from the repository at path are kept. They are
+    specific to this machine, so are kept out of the working tree, where
+    they would be committed with the tasks.
+    """
+    digest = hashlib.sha256(str(path.resolve()).encode("utf-8")).hexdigest()
+    return cache_path() / "repositories" / digest[:16]
+
+
+@contextlib.contextmanager
+def lock(path: Path) -> Iterator[None]:
+    """
+    Hold an exclusive advisory lock on the directory at path for the
+    duration of the block. Unlike the files in it, a directory is never
+    replaced, so every process locks the same inode whatever its cache
+    path, and no lock file is left in the tree.
+    """
+    if not fcntl:
+        yield
+        return
+
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        # closing the descriptor releases the lock
+        os.close(fd)
+
+
+Version = Optional[Tuple[int, int, int]]
+
+
+def version(path: Path) -> Version:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def last_key(keys: Iterable[str]) -> int:
+    return max((int(key) for key in keys if key.isdigit()), default=0)
+
+
+def renumber(tasks: Sequence[Task], keys: Iterable[str]) -> List[Task]:
+    """
+    Copies of tasks with new keys, and their dependencies on each other
+    changed to match. Other dependencies are kept as they are.
+    """
+    new = dict(zip((t.key for t in tasks), keys))
+    return [
+        dataclasses.replace(
+            t, key=new[t.key], dependencies={new.get(d, d) for d in t.dependencies}
+        )
+        for t in tasks
+    ]
+
+
+def external_dependencies(tasks: Sequence[Task]) -> Set[str]:
+    return {d for t in tasks for d in t.dependencies}.difference(t.key for t in tasks)
+
+
+class ConcurrentModificationError(Exception):
+    pass
+
+
+class Archive:
+    """
+    Done tasks moved out of a repository so that listing does not load them.
+    Tasks are kept in one yaml file per month they were done in, so finding
+    the tasks done in a date range only reads the months in that range.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.manifest_path = path / "manifest.yaml"
+
+    def segments(self) -> Iterator[Path]:
+        return (p for p in sorted(self.path.glob("*.yaml")) if p.stem.isdigit())
+
+    def last_key(self) -> int:
+        if not self.manifest_path.exists():
+            return 0
+        return load(self.manifest_path)["last_key"]
+
+    def add(self, tasks: YamlDict) -> None:
+        if not tasks:
+            return
+
+        self.path.mkdir(exist_ok=True)
+
+        months: Dict[str, YamlDict] = {}
+        for key, task in tasks.items():
+            months.setdefault(task["done"][:6], {})[key] = task
+
+        for month, month_tasks in months.items():
+            segment = self.path / f"{month}.yaml"
+            archived = load(segment) if segment.exists() else {}
+            archived.update(month_tasks)
+            dump(archived, segment)
+
+        keys = (int(key) for key in tasks if key.isdigit())
+        dump({"last_key": max(self.last_key(), *keys)}, self.manifest_path)
+
+    def find(self, keys: Iterable[str]) -> YamlDict:
+        keys = set(keys)
+        found: YamlDict = {}
+        for segment in self.segments() if keys else ():
+            archived = load(segment)
+            found.update((key, archived[key]) for key in keys.intersection(archived))
+            if len(found) == len(keys):
+                break
+        return found
+
+    def remove(self, keys: Iterable[str]) -> None:
+        keys = set(keys)
+        for segment in self.segments() if keys else ():
+            archived = load(segment)
+            removed = keys.intersection(archived)
+            if removed:
+                for key in removed:
+                    del archived[key]
+                dump(archived, segment)
+                keys -= removed
+                if not keys:
+                    return
+
+    def between(self, start: date, end: date) -> List[Task]:
+        if not self.path.exists():
+            return []
+
+        first = f"{start.year:04}{start.month:02}"
+        last = f"{end.year:04}{end.month:02}"
+        return [
+            task_from_yaml(t)
+            for segment in self.segments()
+            if first <= segment.stem <= last
+            for t in load(segment).values()
+            if start <= date_from_str(t["done"]) <= end
+        ]
+
+
+# Changes appended to a dependency log before it is folded into one snapshot
+DEPENDENCY_LOG_RECORDS = 256
+
+Dependencies = Dict[str, FrozenSet[str]]
+
+
+def same_version(recorded: Any, current: Any) -> bool:
+    # versions are tuples, which json gives back as lists
+    return recorded == json.loads(json.dumps(current))
+
+
+def last_line(path: Path) -> Optional[bytes]:
+    """
+    The last complete line of path, read backwards from its end, or None
+    if the file is missing, empty or ends with a torn write.
+    """
+    try:
+        f = path.open(mode="rb")
+    except FileNotFoundError:
+        return None
+
+    with f:
+        position = f.seek(0, os.SEEK_END)
+        data = b""
+        while position > 0:
+            step = min(4096, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+            if not data.endswith(b"\n"):
+                return None
+            start = data.rfind(b"\n", 0, len(data) - 1)
+            if start >= 0:
+                return data[start + 1 :]
+        return data or None
+
+
+class DependencyLog:
+    """
+    The dependencies of every task of a repository, done and archived ones
+    too, kept as JSON lines in cache_dir(path): a snapshot followed by the
+    changes made since. Each line records the version of the repository it
+    brings the dependencies up to.
+
+    Writers append their changes while holding the lock of the repository,
+    and only if the last version recorded is the one they changed, so the
+    dependencies are current whenever that version is the repository's.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def read(self, current: Any) -> Optional[Dependencies]:
+        try:
+            with self.path.open(mode="r") as f:
+                snapshot = json.loads(f.readline())
+                dependencies = snapshot["dependencies"]
+                recorded = snapshot["version"]
+                records = 0
+                for line in f:
+                    record = json.loads(line)
+                    dependencies.update(record["changes"])
+                    recorded = record["version"]
+                    records += 1
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+        if not same_version(recorded, current):
+            return None
+
+        found = {key: frozenset(deps) for key, deps in dependencies.items()}
+        if records > DEPENDENCY_LOG_RECORDS:
+            self.write(current, found)
+        return found
+
+    def write(self, current: Any, dependencies: Dependencies) -> None:
+        snapshot = {
+            "version": current,
+            "dependencies": {key: sorted(deps) for key, deps in dependencies.items()},
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(self.path, json.dumps(snapshot) + "\n")
+
+    def append(self, before: Any, after: Any, changes: YamlDict) -> None:
+        """
+        Record the dependencies of changed tasks, as yaml dicts, for a write
+        that took the repository from version before to after.
+        """
+        line = last_line(self.path)
+        try:
+            if line is None or not same_version(json.loads(line)["version"], before):
+                return
+        except (ValueError, KeyError):
+            return
+
+        record = {
+            "version": after,
+            "changes": {
+                key: task.get("dependencies") or [] for key, task in changes.items()
+            },
+        }
+        with self.path.open(mode="a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+# Journals larger than this are folded back into the checkpoint
+COMPACT_SIZE = 256 * 1024
+
+# How every journal record starts, followed by the key of its task
+RECORD_START = '{"key": '
+
+
 class FileRepository:
+    """
+    Tasks stored in a yaml file keyed by task key.
+
+    If a journal file exists next to the yaml file, changes are appended to the
+    journal instead of rewriting the whole file. The yaml file then acts as a
+    checkpoint that the journal is replayed over, and the journal is compacted
+    into it once it grows past COMPACT_SIZE.
+
+    Writes are serialized with an advisory lock on the directory holding the
+    yaml file, so by every process using the repository. Changes to a single task
+    are read without the lock, and are only applied if that task was not
+    changed by another writer in the meantime.
+
+    An index records where each task is in the yaml file, so a single task
+    can be read without decoding the others. It is kept in cache_dir(path),
+    and rebuilt whenever the yaml file no longer matches the version it was
+    built for. The order tasks were last listed in, and the dependencies of
+    every task, are kept there likewise.
+    """
+
     def __init__(self, path: Path):
         self.path = path
+        self.journal = path.with_name(f"{path.name}.journal")
+        self.lock = path.parent
+        self.index_path = cache_dir(path) / "index"
+        self.order_path = cache_dir(path) / "order"
+        self.dependency_log = DependencyLog(cache_dir(path) / "dependencies")
+        self.archived = Archive(path.with_name(f"{path.name}.archive"))
+        self.torn = False
 
     def add(
         self,
@@ -64,48 +458,356 @@ class FileRepository:
         message: str,
         dependencies: Set[str],
     ) -> Task:
-        with self.tasks() as tasks:
-            missing = dependencies.difference(tasks)
+        with lock(self.lock):
+            if self.journal.exists():
+                # only the dependencies are read, the new task is appended
+                tasks = None
+                found = self.find_many(dependencies)
+                last = self.last_key()
+            else:
+                tasks = found = self.read()
+                last = last_key(tasks)
+
+            # done tasks can still be depended on once archived
+            missing = dependencies.difference(found)
+            missing = missing.difference(self.archived.find(missing))
             if missing:
                 raise ValueError(*missing)
 
-            key = str(len(tasks) + 1)
+            key = str(max(last, self.archived.last_key()) + 1)
             task = Task(key, message, category, value, effort, dependencies)
-            tasks[key] = task_to_yaml(task)
+            record = task_to_yaml(task)
+            if tasks is not None:
+                tasks[key] = record
+
+            self.write({key: record}, tasks)
 
         return task
 
-    @contextlib.contextmanager
-    def tasks(self) -> Iterator[YamlDict]:
+    def add_many(self, tasks: Sequence[Task]) -> List[Task]:
+        """
+        Add tasks, in order, with a single write. Each is given a new key,
+        and dependencies on others of tasks are changed to their new keys.
+        """
+        dependencies = external_dependencies(tasks)
+
+        with lock(self.lock):
+            if self.journal.exists():
+                existing = None
+                found = self.find_many(dependencies)
+                last = self.last_key()
+            else:
+                existing = found = self.read()
+                last = last_key(existing)
+
+            missing = dependencies.difference(found)
+            missing = missing.difference(self.archived.find(missing))
+            if missing:
+                raise ValueError(*missing)
+
+            first = max(last, self.archived.last_key()) + 1
+            added = renumber(tasks, map(str, range(first, first + len(tasks))))
+            changes = {t.key: task_to_yaml(t) for t in added}
+            if existing is not None:
+                existing.update(changes)
+
+            self.write(changes, existing)
+
+        return added
+
+    def last_key(self) -> int:
+        """
+        The highest key in the checkpoint or journal. That of the checkpoint
+        is kept with its index, and the journal is kept small, so neither
+        has to be decoded in full.
+        """
+        index = self.load_index()
+        if index["tasks"] is None:
+            checkpoint = last_key(load(self.path))
+        else:
+            checkpoint = index["last_key"]
+        return max(checkpoint, last_key(record["key"] for record in self.records()))
+
+    def version(self) -> Tuple[Version, Version]:
+        return version(self.path), version(self.journal)
+
+    def read(self) -> YamlDict:
         if not self.path.exists():
             raise FileNotFoundError("No tsktsk repository here")
 
-        with self.path.open(mode="r") as f:
-            tasks = yaml.safe_load(f) or {}
+        tasks = load(self.path)
+        tasks.update((record["key"], record) for record in self.records())
+        return tasks
 
-        yield tasks
+    def records(self, keys: Optional[Iterable[str]] = None) -> Iterator[YamlDict]:
+        if not self.journal.exists():
+            return
 
-        with self.path.open("w") as f:
-            yaml.dump(tasks, f)
+        # records are written key first, so other tasks can be skipped unparsed
+        if keys is not None:
+            keys = set(keys)
+            prefix = tuple(f'{{"key": {json.dumps(key)},' for key in keys)
+
+        with self.journal.open(mode="r") as f:
+            for line in f:
+                # an unterminated line is a torn write that was never applied
+                self.torn = not line.endswith("\n")
+                if self.torn:
+                    continue
+                if (
+                    keys is not None
+                    and line.startswith(RECORD_START)
+                    and not line.startswith(prefix)
+                ):
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                # journals written by earlier versions may not start with the key
+                if keys is None or record.get("key") in keys:
+                    yield record
+
+    def index(self) -> Optional[Index]:
+        return self.load_index()["tasks"]
+
+    def load_index(self) -> YamlDict:
+        current = version(self.path)
+        if not current:
+            raise FileNotFoundError("No tsktsk repository here")
+
+        try:
+            with self.index_path.open(mode="r") as f:
+                index = json.load(f)
+            if tuple(index["version"]) == current and "last_key" in index:
+                return index
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+
+        return self.reindex(self.path.read_bytes(), current)
+
+    def reindex(self, text: bytes, current: Version) -> YamlDict:
+        tasks = index_yaml(text)
+        index = {
+            "version": current,
+            "tasks": tasks,
+            "last_key": last_key(tasks) if tasks is not None else None,
+        }
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(self.index_path, json.dumps(index))
+        return index
+
+    def find(self, key: str) -> Optional[YamlDict]:
+        return self.find_many([key]).get(key)
+
+    def find_many(self, keys: Iterable[str]) -> YamlDict:
+        """
+        Read some tasks, using the index to decode only their part of the
+        checkpoint. Falls back to reading everything if the index is unusable.
+        """
+        keys = set(keys)
+        index = self.index()
+        if index is None:
+            return {key: t for key, t in self.read().items() if key in keys}
+
+        tasks: YamlDict = {}
+        with self.path.open(mode="rb") as f:
+            for key in keys.intersection(index):
+                start, end = index[key]
+                f.seek(start)
+                found = yaml.load(f.read(end - start), Loader=Loader)
+                if not isinstance(found, dict) or key not in found:
+                    # the file was replaced while we were reading it
+                    return {k: t for k, t in self.read().items() if k in keys}
+                tasks[key] = found[key]
+
+        tasks.update((record["key"], record) for record in self.records(keys))
+        return tasks
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Task]:
+        keys = set(keys)
+        found = self.find_many(keys)
+        found.update(self.archived.find(keys.difference(found)))
+        return {key: task_from_yaml(t) for key, t in found.items()}
+
+    def write(self, changes: YamlDict, tasks: Optional[YamlDict] = None) -> None:
+        """
+        Write changed tasks, holding the lock. tasks, if given, is the full
+        set of tasks including the changes, otherwise it is read when needed.
+        """
+        before = self.version()
+        self.write_changes(changes, tasks)
+        self.dependency_log.append(before, self.version(), changes)
+
+    def write_changes(self, changes: YamlDict, tasks: Optional[YamlDict]) -> None:
+        if not self.journal.exists():
+            tasks = self.read() if tasks is None else tasks
+            tasks.update(changes)
+            self.checkpoint(tasks)
+            return
+
+        records = "".join(
+            json.dumps({"key": key, **task}) + "\n" for key, task in changes.items()
+        )
+        if self.torn:
+            records = "\n" + records
+            self.torn = False
+
+        with self.journal.open(mode="a") as f:
+            f.write(records)
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+
+        if size > COMPACT_SIZE:
+            self.compact(self.read() if tasks is None else tasks)
+
+    def checkpoint(self, tasks: YamlDict) -> None:
+        text = dump(tasks, self.path)
+        self.reindex(text.encode("utf-8"), version(self.path))
+
+    def compact(self, tasks: YamlDict) -> None:
+        # The checkpoint is replaced before the journal is emptied. Replaying
+        # the journal over the new checkpoint is harmless if we stop in between.
+        self.checkpoint(tasks)
+        if self.journal.exists():
+            with self.journal.open(mode="w"):
+                pass
+
+    def archive(self) -> int:
+        """
+        Move done tasks to the archive, returning how many were moved.
+        The archive is written first, so a task may briefly be in both.
+        """
+        with lock(self.lock):
+            before = self.version()
+            tasks = self.read()
+            done = {key: t for key, t in tasks.items() if t.get("done")}
+
+            self.archived.add(done)
+            for key in done:
+                del tasks[key]
+            self.compact(tasks)
+
+            # archived tasks keep their dependencies
+            self.dependency_log.append(before, self.version(), {})
+
+        return len(done)
 
     @contextlib.contextmanager
     def task(self, key: str) -> Iterator[Task]:
-        with self.tasks() as tasks:
-            task = task_from_yaml(tasks[key])
-            yield task
-            tasks[key] = task_to_yaml(task)
+        """
+        A task that was archived is read from the archive, and only moved
+        back once it is changed. It is written before it is removed from the
+        archive, so as in archive() it may briefly be in both.
+        """
+        read_version = self.version()
+        before = self.find(key)
+        archived = before is None
+        if archived:
+            before = self.archived.find([key]).get(key)
+            if before is None:
+                raise KeyError(key)
 
-    def __iter__(self) -> Iterator[Task]:
-        with self.tasks() as tasks:
-            all_tasks = (task_from_yaml(value) for value in tasks.values())
+        task = task_from_yaml(before)
+        yield task
+        after = task_to_yaml(task)
+
+        if after == before:
+            return
+
+        with lock(self.lock):
+            if self.version() != read_version:
+                current = self.find(key)
+                if current is None:
+                    current = self.archived.find([key]).get(key)
+                if current != before:
+                    raise ConcurrentModificationError(key)
+
+            self.write({key: after})
+            if archived:
+                self.archived.remove([key])
+
+    @contextlib.contextmanager
+    def batch(self, keys: Iterable[str]) -> Iterator[Dict[str, Task]]:
+        keys = list(dict.fromkeys(keys))
+        if len(keys) == 1:
+            # a single task is cheaper to find through the index
+            with each_task(self, keys) as tasks:
+                yield tasks
+            return
+
+        read_version = self.version()
+        tasks = self.read()
+        archived = self.archived.find(key for key in keys if key not in tasks)
 
-        return (t for t in all_tasks if not t.done)
+        failures: Dict[str, Exception] = {
+            key: KeyError(key)
+            for key in keys
+            if key not in tasks and key not in archived
+        }
+        before = {
+            key: tasks[key] if key in tasks else archived[key]
+            for key in keys
+            if key not in failures
+        }
+        found = {key: task_from_yaml(t) for key, t in before.items()}
+        yield found
+
+        after = {key: task_to_yaml(task) for key, task in found.items()}
+        changes = {key: t for key, t in after.items() if t != before[key]}
+
+        if changes:
+            with lock(self.lock):
+                if self.version() != read_version:
+                    tasks = self.read()
+                    current = self.archived.find(k for k in changes if k not in tasks)
+                    current.update(tasks)
+                    for key in [k for k in changes if current.get(k) != before[k]]:
+                        failures[key] = ConcurrentModificationError(key)
+                        del changes[key]
+
+                tasks.update(changes)
+                self.write(changes, tasks)
+                self.archived.remove(key for key in changes if key in archived)
+
+        if failures:
+            raise BatchError(failures)
+
+    def all_dependencies(self) -> Dependencies:
+        """
+        The dependencies of every task, read from the dependency log while
+        it is current, and otherwise from every task.
+        """
+        with lock(self.lock):
+            current = self.version()
+            found = self.dependency_log.read(current)
+            if found is None:
+                found = self.read_dependencies()
+                self.dependency_log.write(current, found)
+            return found
+
+    def read_dependencies(self) -> Dependencies:
+        found = {
+            t.key: t.dependencies for t in self.archived.between(date.min, date.max)
+        }
+        found.update(
+            (key, frozenset(t.get("dependencies") or ()))
+            for key, t in self.read().items()
+        )
+        return found
+
+    def __iter__(self) -> Iterator[Task]:
+        tasks = self.read()
+        return (task_from_yaml(t) for t in tasks.values() if not t.get("done"))
 
     def tasks_done_between(self, start: date, end: date) -> List[Task]:
-        with self.tasks() as tasks:
-            all_tasks = (
-                task_from_yaml(t)
-                for t in tasks.values()
-                if t["done"] and start <= date_from_str(t["done"]) <= end
-            )
-        return list(all_tasks)
+        tasks = self.read()
+        done = [
+            task_from_yaml(t)
+            for t in tasks.values()
+            if t.get("done") and start <= date_from_str(t["done"]) <= end
+        ]
+        return done + [
+            t for t in self.archived.between(start, end) if t.key not in tasks
+        ]
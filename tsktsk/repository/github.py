@@ -1,18 +1,44 @@
 import contextlib
 import dataclasses
-from datetime import date, datetime, time, timezone
-from typing import Any, Dict, Iterator, List, Optional, Set
+import functools
+import itertools
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta, timezone
+from enum import Enum, auto
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlparse
 
 import requests
 
 from tsktsk.repository.auth import GithubAuth
+from tsktsk.repository.batch import BatchError
+from tsktsk.repository.cache import CachingSession, HttpCache
+from tsktsk.repository.graphql import GraphqlIssues
+from tsktsk.repository.ratelimit import RateLimitedAdapter, rate_limit
+from tsktsk.repository.sessions import shared_cache, shared_session
 from tsktsk.task import Category, Effort, Task, Value
 
 JsonObject = Dict[str, Any]
 
+# Requests made at once, github limits concurrent requests
+MAX_WORKERS = 8
 
-def api(path: str) -> str:
-    return f"https://api.github.com{path}"
+# The most github returns at once
+PER_PAGE = 100
+
+# The most results the search api returns for a query
+SEARCH_LIMIT = 1000
+
+
+API_URL = "https://api.github.com"
+
+
+class Engine(Enum):
+    REST = auto()
+    GRAPHQL = auto()
+
+    DEFAULT = REST
 
 
 utc_tm = datetime.utcfromtimestamp(0)
@@ -20,20 +46,44 @@ local_tm = datetime.fromtimestamp(0)
 local_tz = timezone(local_tm - utc_tm)
 
 
+@functools.lru_cache(maxsize=4096)
+def local_dates(day: str) -> Tuple[str, date, date]:
+    """
+    The utc time of day from which times on day fall on the next local date,
+    along with the local dates before and from that time. Times never reach
+    24:00:00, as for a day in utc.
+    """
+    midnight = datetime.fromisoformat(day)
+    offset = local_tm - utc_tm
+    before = (midnight + offset).date()
+    change = datetime.combine(before + timedelta(days=1), time()) - offset
+
+    if change.date() != midnight.date():
+        return "24:00:00", before, before
+    return change.time().isoformat(), before, before + timedelta(days=1)
+
+
 def date_from_str(value: str) -> date:
-    return (
-        datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ")
-        .replace(tzinfo=timezone.utc)
-        .astimezone(local_tz)
-        .date()
-    )
+    # github times are always of the form 2020-01-31T12:00:00Z, so the
+    # conversion is cached by day, and only the time compared
+    change, before, after = local_dates(value[:10])
+    return after if value[11:19] >= change else before
 
 
 def date_to_str(value: date) -> str:
     return datetime.combine(value, time()).replace(tzinfo=local_tz).isoformat()
 
 
+def last_page(response: requests.Response) -> int:
+    last = response.links.get("last")
+    if not last:
+        return 1
+    return int(parse_qs(urlparse(last["url"]).query)["page"][0])
+
+
 class GithubTask(Task):
+    __slots__ = ("additional_labels", "additional_body")
+
     def __init__(self, **kwargs: Any):
         self.additional_labels = kwargs.pop("additional_labels", None)
         self.additional_body = kwargs.pop("additional_body", "")
@@ -43,6 +93,8 @@ class GithubTask(Task):
 
 DEPENDENCIES_HEADER = "dependencies: "
 
+ESTIMATE_LABELS = frozenset(e.value for e in (*Value, *Effort))
+
 
 def create_issue_body(dependencies: Set[str], additional_body: str = "") -> str:
     if not dependencies:
@@ -64,15 +116,11 @@ def task_from_json(issue: JsonObject) -> GithubTask:
         category = Category.DEFAULT
         message = title
 
-    labels = sorted(label["name"] for label in issue["labels"])
+    labels = {label["name"] for label in issue["labels"]}
 
     value = next((v for v in Value if v.value in labels), Value.DEFAULT)
     effort = next((e for e in Effort if e.value in labels), Effort.DEFAULT)
-    additional_labels = sorted(
-        l
-        for l in labels
-        if l not in (v.value for v in Value) and l not in (e.value for e in Effort)
-    )
+    additional_labels = sorted(labels - ESTIMATE_LABELS)
 
     done = issue["closed_at"]
     if done:
@@ -100,6 +148,24 @@ def task_from_json(issue: JsonObject) -> GithubTask:
     )
 
 
+def issues_from_page(
+    content: bytes, items: Optional[str] = None
+) -> Iterator[JsonObject]:
+    """
+    Decode a page of issues straight from the bytes of the response,
+    skipping the pull requests github lists along with them.
+    """
+    result = json.loads(content)
+    issues = result[items] if items else result
+    return (issue for issue in issues if not issue.get("pull_request"))
+
+
+def tasks_from_page(
+    content: bytes, items: Optional[str] = None
+) -> Iterator[GithubTask]:
+    return map(task_from_json, issues_from_page(content, items))
+
+
 def task_to_json(task: GithubTask) -> JsonObject:
     json = {
         "state": "closed" if task.done else "open",
@@ -114,15 +180,48 @@ def task_to_json(task: GithubTask) -> JsonObject:
     return json
 
 
+def github_session(
+    credentials: Tuple[str, Optional[Tuple[str, str]]], cache: Optional[HttpCache]
+) -> requests.Session:
+    http = CachingSession(cache) if cache else requests.Session()
+    http.headers.update({"Accept": "application/vnd.github.v3+json"})
+
+    _, http.auth = credentials
+
+    adapter = RateLimitedAdapter(credentials)
+    http.mount("https://", adapter)
+    http.mount("http://", adapter)
+    return http
+
+
 class GithubRepository:
-    def __init__(self, repo: str, auth: Optional[GithubAuth] = None):
+    def __init__(
+        self,
+        repo: str,
+        auth: Optional[GithubAuth] = None,
+        cache: Optional[HttpCache] = None,
+        engine: Engine = Engine.DEFAULT,
+        api_url: str = API_URL,
+    ):
         self.repo = repo
+        self.api_url = api_url
+
+        credentials = (api_url, dataclasses.astuple(auth) if auth else None)
+        self.rate_limit = rate_limit(credentials)
+        self.cache = shared_cache(cache) if cache else None
+        self.http = shared_session(
+            (credentials, cache.path if cache else None),
+            lambda: github_session(credentials, self.cache),
+        )
 
-        self.http = requests.Session()
-        self.http.headers.update({"Accept": "application/vnd.github.v3+json"})
+        self.graphql = (
+            GraphqlIssues(self.http, f"{api_url}/graphql", repo, PER_PAGE)
+            if engine == Engine.GRAPHQL
+            else None
+        )
 
-        if auth:
-            self.http.auth = dataclasses.astuple(auth)
+    def api(self, path: str) -> str:
+        return f"{self.api_url}{path}"
 
     def add(
         self,
@@ -139,15 +238,15 @@ class GithubRepository:
             json["labels"] = labels
 
         if dependencies:
-            missing = dependencies.difference(
-                str(issue["number"]) for issue in self.issues()
-            )
+            missing = dependencies.difference(self.get_many(dependencies))
             if missing:
                 raise ValueError(*missing)
 
             json["body"] = create_issue_body(dependencies)
 
-        result = self.http.post(api(f"/repos/{self.repo}/issues"), json=json).json()
+        response = self.http.post(self.api(f"/repos/{self.repo}/issues"), json=json)
+        response.raise_for_status()
+        result = response.json()
 
         return Task(
             key=str(result["number"]),
@@ -158,37 +257,162 @@ class GithubRepository:
             dependencies=dependencies,
         )
 
+    def issue(self, key: str) -> JsonObject:
+        response = self.http.get(self.api(f"/repos/{self.repo}/issues/{key}"))
+        if response.status_code == 404:
+            raise KeyError(key)
+        response.raise_for_status()
+        return response.json()
+
+    def update(self, key: str, before: JsonObject, after: JsonObject) -> None:
+        changes = {
+            k: after[k]
+            for k in before.keys() | after.keys()
+            if before.get(k, None) != after.get(k, None)
+        }
+
+        if changes:
+            response = self.http.patch(
+                self.api(f"/repos/{self.repo}/issues/{key}"), json=changes
+            )
+            response.raise_for_status()
+
     @contextlib.contextmanager
     def task(self, key: str) -> Iterator[Task]:
-        issue = self.http.get(api(f"/repos/{self.repo}/issues/{key}")).json()
-
-        task = task_from_json(issue)
+        task = task_from_json(self.issue(key))
 
         before = task_to_json(task)
 
         yield task
 
-        after = task_to_json(task)
+        self.update(key, before, task_to_json(task))
 
-        changes = {
-            k: after[k]
-            for k in before.keys() | after.keys()
-            if before.get(k, None) != after.get(k, None)
-        }
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Task]:
+        def fetch(key: str) -> Optional[JsonObject]:
+            try:
+                issue = self.issue(key)
+            except KeyError:
+                return None
+            return None if issue.get("pull_request") else issue
 
-        if changes:
-            self.http.patch(api(f"/repos/{self.repo}/issues/{key}"), json=changes)
+        keys = list(set(keys))
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(MAX_WORKERS, len(keys)))
+        ) as pool:
+            issues = pool.map(fetch, keys)
+            return {key: task_from_json(i) for key, i in zip(keys, issues) if i}
+
+    @contextlib.contextmanager
+    def batch(self, keys: Iterable[str]) -> Iterator[Dict[str, Task]]:
+        failures: Dict[str, Exception] = {}
+
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            issues = {key: pool.submit(self.issue, key) for key in dict.fromkeys(keys)}
+
+            tasks: Dict[str, GithubTask] = {}
+            for key, issue in issues.items():
+                try:
+                    tasks[key] = task_from_json(issue.result())
+                except (KeyError, requests.RequestException) as e:
+                    failures[key] = e
+
+            before = {key: task_to_json(task) for key, task in tasks.items()}
+
+            yield tasks
+
+            updates = {
+                key: pool.submit(self.update, key, before[key], task_to_json(task))
+                for key, task in tasks.items()
+            }
+
+            for key, update in updates.items():
+                try:
+                    update.result()
+                except requests.RequestException as e:
+                    failures[key] = e
+
+        if failures:
+            raise BatchError(failures)
 
     def issues(self, state="all", since: Optional[str] = None) -> Iterator[JsonObject]:
-        params = f"state={state}{'&since=' + since if since else ''}"
-        result = self.http.get(api(f"/repos/{self.repo}/issues?{params}")).json()
-        return (issue for issue in result if not issue.get("pull_request"))
+        if self.graphql:
+            return self.graphql.issues(state, since)
+
+        params: JsonObject = {"state": state}
+        if since:
+            params["since"] = since
+
+        return self.pages(self.api(f"/repos/{self.repo}/issues"), params)
+
+    def closed_between(self, start: date, end: date) -> Iterator[JsonObject]:
+        """
+        Issues closed in a date range, found with the search api. Search
+        returns at most SEARCH_LIMIT results for a query, so when the range
+        has no start, or more issues were closed in it, the closed issues
+        updated since its start are listed instead.
+        """
+        if start == date.min:
+            return self.issues("closed")
+
+        if self.graphql:
+            return self.issues("closed", since=date_to_str(start))
+
+        last = datetime.combine(end, time.max).replace(tzinfo=local_tz, microsecond=0)
+        closed = f"{date_to_str(start)}..{last.isoformat()}"
+        query = f"repo:{self.repo} is:issue closed:{closed}"
+        responses = self.responses(self.api("/search/issues"), {"q": query})
+
+        first = json.loads(next(responses).content)
+        if first["total_count"] > SEARCH_LIMIT or first.get("incomplete_results"):
+            responses.close()
+            return self.issues("closed", since=date_to_str(start))
+
+        rest = (i for r in responses for i in issues_from_page(r.content, "items"))
+        return itertools.chain(
+            (i for i in first["items"] if not i.get("pull_request")), rest
+        )
+
+    def pages(
+        self, url: str, params: JsonObject, items: Optional[str] = None
+    ) -> Iterator[JsonObject]:
+        for response in self.responses(url, params):
+            yield from issues_from_page(response.content, items)
+
+    def responses(self, url: str, params: JsonObject) -> Iterator[requests.Response]:
+        """
+        Results are fetched a page at a time. Once the first page says how
+        many pages there are, the rest are fetched concurrently, while still
+        being returned in order.
+        """
+        params = {**params, "per_page": PER_PAGE}
+
+        def page(number: int) -> requests.Response:
+            response = self.http.get(url, params={**params, "page": number})
+            response.raise_for_status()
+            return response
+
+        first = page(1)
+        yield first
+
+        pages = range(2, last_page(first) + 1)
+        if not pages:
+            return
+
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(pages))) as pool:
+            yield from pool.map(page, pages)
 
     def __iter__(self) -> Iterator[Task]:
-        yield from (task_from_json(issue) for issue in self.issues("open"))
+        if self.graphql:
+            return map(task_from_json, self.issues("open"))
+
+        # each page is decoded as it arrives, while later ones are fetched
+        pages = self.responses(
+            self.api(f"/repos/{self.repo}/issues"), {"state": "open"}
+        )
+        return (task for page in pages for task in tasks_from_page(page.content))
 
     def tasks_done_between(self, start: date, end: date) -> List[Task]:
-        issues = self.issues("closed", since=date_to_str(start))
+        issues = self.closed_between(start, end)
         return [
             task for task in map(task_from_json, issues) if start <= task.done <= end
         ]
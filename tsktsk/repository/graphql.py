@@ -0,0 +1,137 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+
+JsonObject = Dict[str, Any]
+
+# Closed issues updated within this many days are fetched along with the
+# open ones, enough to cover the velocity estimate made by list --estimates
+RECENT_DAYS = 60
+
+QUERY = """
+query(
+  $owner: String!, $name: String!, $first: Int!,
+  $openSince: DateTime, $closedSince: DateTime, $open: String, $closed: String,
+  $withOpen: Boolean!, $withClosed: Boolean!
+) {
+  repository(owner: $owner, name: $name) {
+    open: issues(
+      states: OPEN, first: $first, after: $open, filterBy: {since: $openSince}
+    ) @include(if: $withOpen) { ...page }
+    closed: issues(
+      states: CLOSED, first: $first, after: $closed, filterBy: {since: $closedSince}
+    ) @include(if: $withClosed) { ...page }
+  }
+}
+
+fragment page on IssueConnection {
+  pageInfo { hasNextPage endCursor }
+  nodes {
+    number title body state closedAt updatedAt
+    labels(first: 100) { nodes { name } }
+  }
+}
+"""
+
+
+class GraphqlError(Exception):
+    pass
+
+
+def issue_from_node(node: JsonObject) -> JsonObject:
+    return {
+        "number": node["number"],
+        "title": node["title"],
+        "body": node["body"],
+        "state": node["state"].lower(),
+        "closed_at": node["closedAt"],
+        "updated_at": node["updatedAt"],
+        "labels": node["labels"]["nodes"],
+    }
+
+
+def parse_time(value: str) -> datetime:
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    return datetime.fromisoformat(value)
+
+
+class GraphqlIssues:
+    """
+    Fetches issues through the GraphQL api, asking only for the fields
+    tasks are made from. Pull requests are not issues there, so they are
+    never sent. Open and recently closed issues are fetched together, a page
+    of each per request, and kept for the life of this object.
+    """
+
+    def __init__(self, http: requests.Session, url: str, repo: str, page_size: int):
+        self.http = http
+        self.url = url
+        self.owner, _, self.name = repo.partition("/")
+        self.page_size = page_size
+        self.recent: Optional[List[JsonObject]] = None
+
+    def fetch(
+        self,
+        open: bool,
+        closed: bool,
+        open_since: Optional[str] = None,
+        closed_since: Optional[str] = None,
+    ) -> Iterator[JsonObject]:
+        variables = {
+            "owner": self.owner,
+            "name": self.name,
+            "first": self.page_size,
+            "openSince": open_since,
+            "closedSince": closed_since,
+            "open": None,
+            "closed": None,
+            "withOpen": open,
+            "withClosed": closed,
+        }
+
+        while variables["withOpen"] or variables["withClosed"]:
+            response = self.http.post(
+                self.url, json={"query": QUERY, "variables": variables}
+            )
+            response.raise_for_status()
+            result = response.json()
+
+            if result.get("errors"):
+                raise GraphqlError(*(e["message"] for e in result["errors"]))
+
+            repository = result["data"]["repository"]
+            for alias in ("open", "closed"):
+                connection = repository.get(alias)
+                if not connection:
+                    continue
+
+                yield from map(issue_from_node, connection["nodes"])
+
+                page = connection["pageInfo"]
+                variables[alias] = page["endCursor"]
+                variables[f"with{alias.capitalize()}"] = page["hasNextPage"]
+
+    def recent_since(self) -> datetime:
+        start = date.today() - timedelta(days=RECENT_DAYS)
+        return datetime.combine(start, datetime.min.time()).astimezone(timezone.utc)
+
+    def issues(self, state: str, since: Optional[str]) -> Iterator[JsonObject]:
+        if state == "all":
+            return self.fetch(True, True, open_since=since, closed_since=since)
+
+        cutoff = self.recent_since()
+        if state == "closed" and (not since or parse_time(since) < cutoff):
+            return self.fetch(False, True, closed_since=since)
+
+        if self.recent is None:
+            recent = self.fetch(True, True, closed_since=cutoff.isoformat())
+            self.recent = list(recent)
+
+        return (
+            issue
+            for issue in self.recent
+            if issue["state"] == state
+            and (not since or parse_time(issue["updated_at"]) >= parse_time(since))
+        )
@@ -0,0 +1,74 @@
+from datetime import date, datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import requests
+
+import tsktsk.db.issues as issues_dao
+from tsktsk.repository.github import (
+    GithubRepository,
+    JsonObject,
+    date_to_str,
+    task_from_json,
+)
+from tsktsk.task import Task
+
+
+def utc(value: str) -> str:
+    return (
+        datetime.fromisoformat(value)
+        .astimezone(timezone.utc)
+        .strftime("%Y-%m-%dT%H:%M:%SZ")
+    )
+
+
+class MirroredGithubRepository(GithubRepository):
+    """
+    A github repository whose issues are mirrored in the bot's database.
+    Each read first fetches only the issues updated since the last sync,
+    then answers from the mirror.
+    """
+
+    def sync(self) -> None:
+        """
+        Fetch the issues updated since the last sync. The time the sync
+        started, by github's clock, is recorded as the next sync point, so
+        an issue updated while its pages are read is fetched again next time.
+        """
+        since = issues_dao.last_synced(self.repo)
+
+        dates: List[str] = []
+
+        def record(response: requests.Response, *args: Any, **kwargs: Any) -> None:
+            if "Date" in response.headers:
+                dates.append(response.headers["Date"])
+
+        # the earliest response is that of the first request, or of another
+        # made on a shared session meanwhile, which only starts the sync earlier
+        self.http.hooks["response"].append(record)
+        try:
+            issues = list(super().issues("all", since=since))
+        finally:
+            self.http.hooks["response"].remove(record)
+
+        started = min(map(parsedate_to_datetime, dates), default=None)
+        synced_at = utc(started.isoformat()) if started else None
+        issues_dao.merge(self.repo, issues, synced_at)
+
+    def issues(self, state="all", since: Optional[str] = None) -> Iterator[JsonObject]:
+        self.sync()
+        return issues_dao.find(self.repo, state, utc(since) if since else None)
+
+    def __iter__(self) -> Iterator[Task]:
+        return map(task_from_json, self.issues("open"))
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Task]:
+        self.sync()
+        numbers = [int(key) for key in set(keys) if key.isdigit()]
+        issues = issues_dao.find_numbers(self.repo, numbers)
+        return {str(issue["number"]): task_from_json(issue) for issue in issues}
+
+    def closed_between(self, start: date, end: date) -> Iterator[JsonObject]:
+        # date.min is out of range once moved to utc from east of it
+        since = date_to_str(start) if start > date.min else None
+        return self.issues("closed", since=since)
@@ -0,0 +1,148 @@
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from tsktsk.repository.sessions import PooledAdapter
+
+# Once less than this fraction of the budget is left, the rest is spread
+# evenly until it resets rather than used as fast as possible
+LOW_BUDGET = 0.1
+
+# Longest we wait for the budget to reset before giving up on a request
+MAX_WAIT = 60
+
+MAX_RETRIES = 4
+
+
+class RateLimit:
+    """
+    A token bucket holding the requests github still allows, refilled when
+    the limit resets. It is updated from the X-RateLimit headers of each
+    response, and paused by Retry-After when a secondary limit is hit.
+    """
+
+    def __init__(self, clock=time.time, sleep=time.sleep):
+        self.clock = clock
+        self.sleep = sleep
+        self.lock = threading.Lock()
+
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset = 0.0
+        self.paused_until = 0.0
+        self.next_slot = 0.0
+
+    def acquire(self) -> float:
+        """
+        Take a token, waiting for one if necessary. Returns how long we
+        waited, or raises RateLimitExceeded if that would be too long.
+        """
+        with self.lock:
+            now = self.clock()
+            if self.reset <= now and self.limit is not None:
+                self.remaining = self.limit
+
+            wait = max(0.0, self.paused_until - now)
+
+            if self.remaining is not None and self.limit is not None:
+                if self.remaining <= 0:
+                    wait = max(wait, self.reset - now)
+                elif self.remaining < self.limit * LOW_BUDGET:
+                    wait = max(wait, self.next_slot - now)
+                    spacing = max(0.0, self.reset - now) / self.remaining
+                    self.next_slot = now + wait + spacing
+
+                self.remaining -= 1
+
+            if wait > MAX_WAIT:
+                raise RateLimitExceeded(wait)
+
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+    def update(self, response: requests.Response) -> None:
+        headers = response.headers
+        with self.lock:
+            if "X-RateLimit-Remaining" in headers:
+                self.limit = int(headers["X-RateLimit-Limit"])
+                self.remaining = int(headers["X-RateLimit-Remaining"])
+                self.reset = float(headers["X-RateLimit-Reset"])
+
+            if "Retry-After" in headers:
+                self.paused_until = self.clock() + float(headers["Retry-After"])
+
+    def backoff(self, delay: float) -> None:
+        with self.lock:
+            self.paused_until = max(self.paused_until, self.clock() + delay)
+
+
+class RateLimitExceeded(requests.RequestException):
+    pass
+
+
+def is_rate_limited(response: requests.Response) -> bool:
+    if response.status_code not in (403, 429):
+        return False
+    return (
+        response.headers.get("X-RateLimit-Remaining") == "0"
+        or "Retry-After" in response.headers
+        or "rate limit" in response.text.lower()
+    )
+
+
+class RateLimitedAdapter(PooledAdapter):
+    """
+    Sends requests once the rate limit allows, and retries those that were
+    rate limited, or reads that failed on github's side, with exponential
+    backoff.
+    """
+
+    def __init__(self, credentials: Hashable, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.credentials = credentials
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any):
+        limit = rate_limit(self.credentials, resource(request))
+
+        attempt = 0
+        while True:
+            limit.acquire()
+            response = super().send(request, **kwargs)
+            limit.update(response)
+
+            # only reads are safe to send twice after an error on github's side
+            retry = is_rate_limited(response) or (
+                response.status_code >= 500 and request.method in ("GET", "HEAD")
+            )
+            if not retry or attempt == MAX_RETRIES:
+                return response
+
+            response.close()
+            limit.backoff(2 ** attempt)
+            attempt += 1
+
+
+limits: Dict[Hashable, RateLimit] = {}
+limits_lock = threading.Lock()
+
+
+def rate_limit(credentials: Hashable, resource: str = "core") -> RateLimit:
+    """
+    The rate limit shared by every repository using the same credentials.
+    Github limits search and graphql separately from the rest of the api.
+    """
+    with limits_lock:
+        return limits.setdefault((credentials, resource), RateLimit())
+
+
+def resource(request: requests.PreparedRequest) -> str:
+    path = urlparse(request.url).path
+    if path.endswith("/graphql"):
+        return "graphql"
+    if "/search/" in path:
+        return "search"
+    return "core"
@@ -0,0 +1,121 @@
+import logging
+import socket
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+from tsktsk.config import Env
+from tsktsk.repository.cache import HttpCache
+
+log = logging.getLogger(__name__)
+
+# Connections kept open to each host, enough for the requests github
+# repositories make at once
+POOL_SIZE = 10
+
+# Seconds a pooled connection may sit idle before the os checks it is alive
+KEEPALIVE = 60
+
+
+def pool_size() -> int:
+    return int(Env.HTTP_POOL_SIZE.get(str(POOL_SIZE)))
+
+
+def socket_options() -> List[Tuple[int, int, int]]:
+    keepalive = int(Env.HTTP_KEEPALIVE.get(str(KEEPALIVE)))
+    options = list(HTTPConnection.default_socket_options)
+    if keepalive <= 0:
+        return options
+
+    options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    # not every platform lets the probes be tuned
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, keepalive))
+    if hasattr(socket, "TCP_KEEPINTVL"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, keepalive))
+    return options
+
+
+class PooledAdapter(HTTPAdapter):
+    """
+    An adapter keeping pool_size() connections to each host, with tcp
+    keep-alive so idle connections are still usable when the next command
+    comes along.
+    """
+
+    def __init__(self, **kwargs: Any):
+        size = pool_size()
+        kwargs.setdefault("pool_connections", size)
+        kwargs.setdefault("pool_maxsize", size)
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        kwargs.setdefault("socket_options", socket_options())
+        super().init_poolmanager(*args, **kwargs)
+
+
+sessions: Dict[Hashable, requests.Session] = {}
+sessions_lock = threading.Lock()
+
+
+def shared_session(
+    key: Hashable, create: Callable[[], requests.Session]
+) -> requests.Session:
+    """
+    The session for key, created on first use and then shared by the whole
+    process, so connections and their tls handshakes outlive a command.
+    Sessions are shared between threads, so must not be changed once created.
+    """
+    with sessions_lock:
+        if key not in sessions:
+            sessions[key] = create()
+        return sessions[key]
+
+
+caches: Dict[Path, HttpCache] = {}
+
+
+def shared_cache(cache: HttpCache) -> HttpCache:
+    """
+    The cache for the path of cache, which is cache itself when it is the
+    first for its path. The shared session for a path counts its hits and
+    misses on this cache, whichever cache a later repository was given.
+    """
+    with sessions_lock:
+        return caches.setdefault(cache.path, cache)
+
+
+def connection_stats() -> Dict[str, int]:
+    """
+    Requests sent and connections opened by the shared sessions. Requests
+    beyond the connections opened were sent over a reused connection.
+    """
+    stats = {"requests": 0, "connections": 0}
+
+    with sessions_lock:
+        adapters = {id(a): a for s in sessions.values() for a in s.adapters.values()}
+
+    for adapter in adapters.values():
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool:
+                stats["requests"] += pool.num_requests
+                stats["connections"] += pool.num_connections
+
+    stats["reused"] = stats["requests"] - stats["connections"]
+    return stats
+
+
+def log_connection_stats() -> None:
+    stats = connection_stats()
+    log.info(
+        "%d http requests over %d connections, %d reused",
+        stats["requests"],
+        stats["connections"],
+        stats["reused"],
+    )
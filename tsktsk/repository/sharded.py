@@ -0,0 +1,286 @@
+import contextlib
+from datetime import date
+from pathlib import Path
+from typing import (
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+)
+
+from tsktsk.repository.batch import each_task
+from tsktsk.repository.file import (
+    Archive,
+    ConcurrentModificationError,
+    Dependencies,
+    DependencyLog,
+    Version,
+    YamlDict,
+    cache_dir,
+    date_from_str,
+    dump,
+    external_dependencies,
+    load,
+    lock,
+    renumber,
+    task_from_yaml,
+    task_to_yaml,
+    version,
+)
+from tsktsk.task import Category, Effort, Task, Value
+
+BUCKET_SIZE = 50
+
+
+class ShardedFileRepository:
+    """
+    Tasks stored in a directory, with tasks split by key into buckets of
+    yaml files under tasks/. A manifest records the bucket size and the next
+    key to allocate, so changing a task only reads and writes its bucket.
+
+    Writes are serialized with a lock on the directory itself, and take the
+    same version checks as FileRepository. Done tasks can be moved to an
+    archive/ directory, and the dependencies of every task are logged, in the
+    same way.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.manifest_path = path / "manifest.yaml"
+        self.lock = path
+        self.order_path = cache_dir(path) / "order"
+        self.dependency_log = DependencyLog(cache_dir(path) / "dependencies")
+        self.archived = Archive(path / "archive")
+
+    @classmethod
+    def create(
+        cls, path: Path, tasks: Iterable[Task] = (), bucket_size: int = BUCKET_SIZE
+    ) -> "ShardedFileRepository":
+        path.mkdir()
+        (path / "tasks").mkdir()
+
+        repo = cls(path)
+        manifest = {"bucket_size": bucket_size, "next_key": 1}
+
+        shards: Dict[Path, YamlDict] = {}
+        for task in tasks:
+            shard = repo.shard(task.key, manifest)
+            shards.setdefault(shard, {})[task.key] = task_to_yaml(task)
+            manifest["next_key"] = max(manifest["next_key"], int(task.key) + 1)
+
+        for shard, shard_tasks in shards.items():
+            dump(shard_tasks, shard)
+
+        repo.write_manifest(manifest)
+        return repo
+
+    def version(self) -> Optional[List[Version]]:
+        manifest = version(self.manifest_path)
+        if not manifest:
+            return None
+        return [manifest, *map(version, (self.path / "tasks").glob("*.yaml"))]
+
+    def manifest(self) -> YamlDict:
+        if not self.manifest_path.exists():
+            raise FileNotFoundError("No tsktsk repository here")
+
+        return load(self.manifest_path)
+
+    def write_manifest(self, manifest: YamlDict) -> None:
+        dump(manifest, self.manifest_path)
+
+    def shard(self, key: str, manifest: YamlDict) -> Path:
+        if not key.isdigit():
+            raise KeyError(key)
+
+        return self.path / "tasks" / f"{int(key) // manifest['bucket_size']}.yaml"
+
+    def shard_paths(self) -> List[Path]:
+        self.manifest()
+
+        return sorted((self.path / "tasks").glob("*.yaml"), key=lambda p: int(p.stem))
+
+    def shards(self) -> Iterator[YamlDict]:
+        return (load(path) for path in self.shard_paths())
+
+    def find(self, keys: Set[str], manifest: YamlDict) -> YamlDict:
+        found: YamlDict = {}
+        for shard in {self.shard(key, manifest) for key in keys if key.isdigit()}:
+            if shard.exists():
+                tasks = load(shard)
+                found.update((key, tasks[key]) for key in keys if key in tasks)
+        return found
+
+    def add(
+        self,
+        category: Category,
+        value: Value,
+        effort: Effort,
+        message: str,
+        dependencies: Set[str],
+    ) -> Task:
+        with self.writing() as changes:
+            manifest = self.manifest()
+
+            missing = dependencies.difference(self.find(dependencies, manifest))
+            missing = missing.difference(self.archived.find(missing))
+            if missing:
+                raise ValueError(*missing)
+
+            key = str(manifest["next_key"])
+            task = Task(key, message, category, value, effort, dependencies)
+
+            shard = self.shard(key, manifest)
+            tasks = load(shard) if shard.exists() else {}
+            tasks[key] = changes[key] = task_to_yaml(task)
+            dump(tasks, shard)
+
+            manifest["next_key"] += 1
+            self.write_manifest(manifest)
+
+        return task
+
+    def add_many(self, tasks: Sequence[Task]) -> List[Task]:
+        """
+        Add tasks, in order, writing each bucket they fall in once. Each is
+        given a new key, and dependencies on others of tasks are changed to
+        their new keys.
+        """
+        dependencies = external_dependencies(tasks)
+
+        with self.writing() as changes:
+            manifest = self.manifest()
+
+            missing = dependencies.difference(self.find(dependencies, manifest))
+            missing = missing.difference(self.archived.find(missing))
+            if missing:
+                raise ValueError(*missing)
+
+            first = manifest["next_key"]
+            added = renumber(tasks, map(str, range(first, first + len(tasks))))
+
+            shards: Dict[Path, YamlDict] = {}
+            for task in added:
+                shard = self.shard(task.key, manifest)
+                if shard not in shards:
+                    shards[shard] = load(shard) if shard.exists() else {}
+                shards[shard][task.key] = changes[task.key] = task_to_yaml(task)
+
+            for shard, shard_tasks in shards.items():
+                dump(shard_tasks, shard)
+
+            manifest["next_key"] = first + len(tasks)
+            self.write_manifest(manifest)
+
+        return added
+
+    def archive(self) -> int:
+        # archived tasks keep their dependencies, so no changes are recorded
+        with self.writing():
+            shards = {path: load(path) for path in self.shard_paths()}
+            done = {
+                key: t
+                for tasks in shards.values()
+                for key, t in tasks.items()
+                if t.get("done")
+            }
+
+            self.archived.add(done)
+            for path, tasks in shards.items():
+                archived = [key for key in tasks if key in done]
+                for key in archived:
+                    del tasks[key]
+                if archived:
+                    dump(tasks, path)
+
+        return len(done)
+
+    @contextlib.contextmanager
+    def task(self, key: str) -> Iterator[Task]:
+        shard = self.shard(key, self.manifest())
+        read_version = version(shard)
+        tasks = load(shard) if read_version else {}
+        archived = key not in tasks
+        # archived tasks are moved back only once changed, as in FileRepository
+        before = self.archived.find([key]).get(key) if archived else tasks[key]
+        if before is None:
+            raise KeyError(key)
+
+        task = task_from_yaml(before)
+        yield task
+        after = task_to_yaml(task)
+
+        if after == before:
+            return
+
+        with self.writing() as changes:
+            if version(shard) != read_version:
+                tasks = load(shard) if shard.exists() else {}
+                current = tasks.get(key)
+                if current is None:
+                    current = self.archived.find([key]).get(key)
+                if current != before:
+                    raise ConcurrentModificationError(key)
+
+            tasks[key] = changes[key] = after
+            dump(tasks, shard)
+            if archived:
+                self.archived.remove([key])
+
+    @contextlib.contextmanager
+    def writing(self) -> Iterator[YamlDict]:
+        """
+        Hold the lock while writing, then record the dependencies of the
+        tasks changed, which are added to the dict given.
+        """
+        with lock(self.lock):
+            before = self.version()
+            changes: YamlDict = {}
+            yield changes
+            self.dependency_log.append(before, self.version(), changes)
+
+    def all_dependencies(self) -> Dependencies:
+        with lock(self.lock):
+            current = self.version()
+            found = self.dependency_log.read(current)
+            if found is None:
+                found = {
+                    t.key: t.dependencies
+                    for t in self.archived.between(date.min, date.max)
+                }
+                found.update(
+                    (key, frozenset(t.get("dependencies") or ()))
+                    for tasks in self.shards()
+                    for key, t in tasks.items()
+                )
+                self.dependency_log.write(current, found)
+            return found
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Task]:
+        keys = set(keys)
+        found = self.find(keys, self.manifest())
+        found.update(self.archived.find(keys.difference(found)))
+        return {key: task_from_yaml(t) for key, t in found.items()}
+
+    def batch(self, keys: Iterable[str]) -> ContextManager[Dict[str, Task]]:
+        return each_task(self, keys)
+
+    def __iter__(self) -> Iterator[Task]:
+        for tasks in self.shards():
+            yield from (task_from_yaml(t) for t in tasks.values() if not t.get("done"))
+
+    def tasks_done_between(self, start: date, end: date) -> List[Task]:
+        done = [
+            task_from_yaml(t)
+            for tasks in self.shards()
+            for t in tasks.values()
+            if t.get("done") and start <= date_from_str(t["done"]) <= end
+        ]
+        keys = {t.key for t in done}
+        return done + [
+            t for t in self.archived.between(start, end) if t.key not in keys
+        ]
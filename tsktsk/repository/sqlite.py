@@ -0,0 +1,241 @@
+import contextlib
+import sqlite3
+from datetime import date
+from pathlib import Path
+from typing import (
+    ContextManager,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from tsktsk.db import apply_migrations, connection
+from tsktsk.repository.batch import each_task
+from tsktsk.repository.file import cache_dir, external_dependencies, renumber
+from tsktsk.task import Category, Effort, Task, Value
+
+SELECT_TASKS = """
+    SELECT tasks.*, group_concat(dependency) AS dependencies
+    FROM tasks LEFT JOIN task_dependencies ON task = key
+"""
+
+
+def task_from_row(row: sqlite3.Row) -> Task:
+    dependencies = row["dependencies"]
+    done = row["done"]
+
+    return Task(
+        key=str(row["key"]),
+        message=row["message"],
+        category=Category.__members__[row["category"]],
+        value=Value.__members__[row["value"]],
+        effort=Effort.__members__[row["effort"]],
+        dependencies=set(dependencies.split(",")) if dependencies else set(),
+        done=date.fromisoformat(done) if done else None,
+    )
+
+
+def task_to_row(task: Task) -> Tuple[int, str, str, str, str, Optional[str]]:
+    return (
+        int(task.key),
+        task.message,
+        task.category.name,
+        task.value.name,
+        task.effort.name,
+        task.done.isoformat() if task.done else None,
+    )
+
+
+class SqliteRepository:
+    def __init__(self, path: Path):
+        self.path = path
+        self.order_path = cache_dir(path) / "order"
+        self.migrated = False
+
+    def version(self) -> Optional[Tuple[int, int]]:
+        try:
+            with self.path.open(mode="rb") as f:
+                header = f.read(28)
+        except FileNotFoundError:
+            return None
+        # sqlite counts the transactions that changed the file in its header
+        return self.path.stat().st_ino, int.from_bytes(header[24:28], "big")
+
+    @contextlib.contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        if not self.path.exists():
+            raise FileNotFoundError("No tsktsk repository here")
+
+        if not self.migrated:
+            apply_migrations(str(self.path), "repository_migrations")
+            self.migrated = True
+
+        with connection(str(self.path)) as conn:
+            yield conn
+
+    @classmethod
+    def create(cls, path: Path, tasks: Iterable[Task] = ()) -> "SqliteRepository":
+        if path.exists():
+            raise FileExistsError("Repository already exists")
+
+        apply_migrations(str(path), "repository_migrations")
+
+        repo = cls(path)
+        with repo.connection() as conn:
+            for task in tasks:
+                insert(conn, task)
+        return repo
+
+    def add(
+        self,
+        category: Category,
+        value: Value,
+        effort: Effort,
+        message: str,
+        dependencies: Set[str],
+    ) -> Task:
+        with self.connection() as conn:
+            missing = dependencies.difference(existing(conn, dependencies))
+            if missing:
+                raise ValueError(*missing)
+
+            cursor = conn.execute(
+                "INSERT INTO tasks(message, category, value, effort) VALUES (?, ?, ?, ?)",
+                (message, category.name, value.name, effort.name),
+            )
+            task = Task(
+                str(cursor.lastrowid), message, category, value, effort, dependencies
+            )
+            insert_dependencies(conn, task)
+
+        return task
+
+    def add_many(self, tasks: Sequence[Task]) -> List[Task]:
+        """
+        Add tasks, in order, in a single transaction. Each is given a new key,
+        and dependencies on others of tasks are changed to their new keys.
+        """
+        dependencies = external_dependencies(tasks)
+
+        with self.connection() as conn:
+            missing = dependencies.difference(existing(conn, dependencies))
+            if missing:
+                raise ValueError(*missing)
+
+            keys = []
+            for task in tasks:
+                cursor = conn.execute(
+                    "INSERT INTO tasks(message, category, value, effort, done) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        task.message,
+                        task.category.name,
+                        task.value.name,
+                        task.effort.name,
+                        task.done.isoformat() if task.done else None,
+                    ),
+                )
+                keys.append(str(cursor.lastrowid))
+            added = renumber(tasks, keys)
+            for task in added:
+                insert_dependencies(conn, task)
+
+        return added
+
+    @contextlib.contextmanager
+    def task(self, key: str) -> Iterator[Task]:
+        with self.connection() as conn:
+            row = conn.execute(
+                f"{SELECT_TASKS} WHERE key = ? GROUP BY key", (key,)
+            ).fetchone()
+            if not row:
+                raise KeyError(key)
+
+            task = task_from_row(row)
+            before = task_to_row(task)
+            dependencies = set(task.dependencies)
+
+            yield task
+
+            after = task_to_row(task)
+            if after != before:
+                conn.execute(
+                    "UPDATE tasks SET message = ?, category = ?, value = ?, effort = ?, done = ? WHERE key = ?",
+                    (*after[1:], after[0]),
+                )
+
+            if task.dependencies != dependencies:
+                conn.execute("DELETE FROM task_dependencies WHERE task = ?", (key,))
+                insert_dependencies(conn, task)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Task]:
+        keys = [key for key in set(keys) if key.isdigit()]
+        if not keys:
+            return {}
+
+        with self.connection() as conn:
+            rows = conn.execute(
+                f"{SELECT_TASKS} WHERE key IN ({', '.join('?' * len(keys))}) GROUP BY key",
+                keys,
+            )
+            return {str(row["key"]): task_from_row(row) for row in rows}
+
+    def all_dependencies(self) -> Dict[str, FrozenSet[str]]:
+        with self.connection() as conn:
+            rows = conn.execute(
+                "SELECT key, group_concat(dependency) AS dependencies"
+                " FROM tasks LEFT JOIN task_dependencies ON task = key GROUP BY key"
+            )
+            return {
+                str(row["key"]): frozenset(
+                    row["dependencies"].split(",") if row["dependencies"] else ()
+                )
+                for row in rows
+            }
+
+    def batch(self, keys: Iterable[str]) -> ContextManager[Dict[str, Task]]:
+        return each_task(self, keys)
+
+    def __iter__(self) -> Iterator[Task]:
+        with self.connection() as conn:
+            rows = conn.execute(f"{SELECT_TASKS} WHERE done IS NULL GROUP BY key")
+            yield from map(task_from_row, rows)
+
+    def tasks_done_between(self, start: date, end: date) -> List[Task]:
+        with self.connection() as conn:
+            rows = conn.execute(
+                f"{SELECT_TASKS} WHERE done BETWEEN ? AND ? GROUP BY key",
+                (start.isoformat(), end.isoformat()),
+            )
+            return list(map(task_from_row, rows))
+
+
+def existing(conn: sqlite3.Connection, keys: Set[str]) -> Set[str]:
+    if not keys:
+        return set()
+
+    rows = conn.execute(
+        f"SELECT key FROM tasks WHERE key IN ({', '.join('?' * len(keys))})",
+        list(keys),
+    )
+    return {str(row["key"]) for row in rows}
+
+
+def insert(conn: sqlite3.Connection, task: Task) -> None:
+    conn.execute(
+        "INSERT INTO tasks(key, message, category, value, effort, done) VALUES (?, ?, ?, ?, ?, ?)",
+        task_to_row(task),
+    )
+    insert_dependencies(conn, task)
+
+
+def insert_dependencies(conn: sqlite3.Connection, task: Task) -> None:
+    conn.executemany(
+        "INSERT INTO task_dependencies(task, dependency) VALUES (?, ?)",
+        ((int(task.key), int(dep)) for dep in task.dependencies),
+    )
@@ -0,0 +1,185 @@
+import dataclasses
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, TextIO
+
+from tsktsk.repository.file import CATEGORIES, EFFORTS, VALUES, lookup
+from tsktsk.task import Task, intern_keys
+
+JsonObject = Dict[str, Any]
+
+# Tasks linked to their dependencies, and recorded as linked, at once
+LINK_BATCH = 100
+
+
+def task_to_json(task: Task) -> JsonObject:
+    return {
+        "key": task.key,
+        "message": task.message,
+        "category": task.category.name.lower(),
+        "value": task.value.name.lower(),
+        "effort": task.effort.name.lower(),
+        "dependencies": sorted(task.dependencies, key=int),
+        "done": task.done.isoformat() if task.done else None,
+    }
+
+
+def task_from_json(record: JsonObject) -> Task:
+    done = record.get("done")
+    return Task(
+        key=str(record["key"]),
+        message=record["message"],
+        category=lookup(CATEGORIES, record.get("category") or "default"),
+        value=lookup(VALUES, record.get("value") or "default"),
+        effort=lookup(EFFORTS, record.get("effort") or "default"),
+        dependencies=frozenset(map(str, record.get("dependencies") or ())),
+        done=date.fromisoformat(done) if done else None,
+    )
+
+
+def export_tasks(repo: Any) -> Iterator[Task]:
+    """
+    Every task in repo, open ones first, then those done.
+    """
+    keys = set()
+    for task in repo:
+        keys.add(task.key)
+        yield task
+
+    for task in repo.tasks_done_between(date.min, date.max):
+        if task.key not in keys:
+            yield task
+
+
+def write_tasks(tasks: Iterable[Task], output: TextIO) -> int:
+    count = 0
+    for task in tasks:
+        output.write(json.dumps(task_to_json(task), ensure_ascii=False))
+        output.write("\n")
+        count += 1
+    return count
+
+
+def read_tasks(input: TextIO) -> Iterator[Task]:
+    for line in input:
+        if line.strip():
+            yield task_from_json(json.loads(line))
+
+
+class Checkpoint:
+    """
+    Progress of an import, appended to a file as each task is added and
+    linked to its dependencies, so an interrupted import picks up where it
+    stopped. A task added just before an interruption, but not yet
+    recorded, is added again.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.keys: Dict[str, str] = {}
+        self.linked = set()
+
+        if path.exists():
+            self.load()
+
+    def load(self) -> None:
+        with self.path.open(mode="r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # the last line may be torn by the interruption
+                    continue
+                if "linked" in entry:
+                    self.linked.add(entry["linked"])
+                else:
+                    self.keys[entry["key"]] = entry["new"]
+
+    @staticmethod
+    def record(entry: JsonObject, output: TextIO) -> None:
+        output.write(json.dumps(entry))
+        output.write("\n")
+        output.flush()
+
+
+def import_tasks(
+    repo: Any, tasks: Iterable[Task], checkpoint: Path, workers: int = 1
+) -> Dict[str, str]:
+    """
+    Add tasks to repo, which gives them new keys. Local repositories add
+    them all, linked to each other, in one write. Github adds them by up to
+    workers at once, and they are then linked to their dependencies in
+    batches once the new key of each is known. Dependencies on tasks that
+    were not imported are dropped. Returns the new key of each task.
+    """
+    progress = Checkpoint(checkpoint)
+    # added in the order of their keys, so a local repository numbers them alike
+    tasks = sorted(tasks, key=lambda t: int(t.key))
+    pending = [t for t in tasks if t.key not in progress.keys]
+
+    with checkpoint.open(mode="a") as output:
+        if hasattr(repo, "add_many"):
+            add_all(repo, pending, progress, output)
+        else:
+            add_each(repo, pending, progress, output, workers)
+
+        unlinked = [t for t in tasks if t.dependencies and t.key not in progress.linked]
+        for start in range(0, len(unlinked), LINK_BATCH):
+            chunk = {
+                progress.keys[t.key]: t for t in unlinked[start : start + LINK_BATCH]
+            }
+            with repo.batch(chunk) as batch:
+                for key, t in batch.items():
+                    t.dependencies = intern_keys(
+                        progress.keys[d]
+                        for d in chunk[key].dependencies
+                        if d in progress.keys
+                    )
+            for t in chunk.values():
+                progress.record({"linked": t.key}, output)
+
+    checkpoint.unlink()
+    return progress.keys
+
+
+def add_all(repo: Any, tasks: List[Task], progress: Checkpoint, output: TextIO) -> None:
+    # dependencies on tasks added by an interrupted import are linked later
+    keys = {t.key for t in tasks}
+    added = repo.add_many(
+        [dataclasses.replace(t, dependencies=t.dependencies & keys) for t in tasks]
+    )
+
+    for task, new in zip(tasks, added):
+        progress.keys[task.key] = new.key
+        progress.record({"key": task.key, "new": new.key}, output)
+        if task.dependencies <= keys:
+            progress.linked.add(task.key)
+            progress.record({"linked": task.key}, output)
+
+
+def add_each(
+    repo: Any, tasks: List[Task], progress: Checkpoint, output: TextIO, workers: int
+) -> None:
+    def add(task: Task) -> str:
+        added = repo.add(task.category, task.value, task.effort, task.message, set())
+        if task.done:
+            with repo.task(added.key) as t:
+                t.done = task.done
+        return added.key
+
+    errors = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(add, task): task for task in tasks}
+        # record each task as it is added, so none is added twice
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                progress.keys[task.key] = future.result()
+            except Exception as e:
+                errors.append(e)
+                continue
+            progress.record({"key": task.key, "new": progress.keys[task.key]}, output)
+    if errors:
+        raise errors[0]
@@ -0,0 +1,13 @@
+CREATE TABLE IF NOT EXISTS github_issues(
+    repo TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    issue TEXT NOT NULL,
+    PRIMARY KEY (repo, number)
+);
+
+CREATE TABLE IF NOT EXISTS github_syncs(
+    repo TEXT PRIMARY KEY,
+    synced_at TEXT NOT NULL
+);
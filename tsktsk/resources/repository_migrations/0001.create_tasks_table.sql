@@ -0,0 +1,18 @@
+CREATE TABLE IF NOT EXISTS tasks(
+    key INTEGER PRIMARY KEY AUTOINCREMENT,
+    message TEXT NOT NULL,
+    category TEXT NOT NULL,
+    value TEXT NOT NULL,
+    effort TEXT NOT NULL,
+    done TEXT
+);
+
+CREATE INDEX IF NOT EXISTS tasks_done ON tasks(done);
+
+CREATE TABLE IF NOT EXISTS task_dependencies(
+    task INTEGER NOT NULL REFERENCES tasks(key),
+    dependency INTEGER NOT NULL REFERENCES tasks(key),
+    PRIMARY KEY (task, dependency)
+);
+
+CREATE INDEX IF NOT EXISTS task_dependencies_dependency ON task_dependencies(dependency);
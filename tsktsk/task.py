@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 import dataclasses
+import sys
 from datetime import date
 from enum import Enum
-from typing import Optional, Set
+from typing import AbstractSet, FrozenSet, Iterable, Optional, Type, TypeVar
 
 
 class Category(Enum):
@@ -39,16 +40,48 @@ class TaskError(Exception):
     pass
 
 
+C = TypeVar("C")
+
+
+def slotted(cls: Type[C]) -> Type[C]:
+    """
+    Recreate a dataclass with __slots__ for its fields, so instances do not
+    carry a __dict__. dataclass(slots=True) does this from python 3.10.
+    """
+    names = tuple(field.name for field in dataclasses.fields(cls))
+    namespace = {
+        k: v
+        for k, v in cls.__dict__.items()
+        if k not in names and k not in ("__dict__", "__weakref__")
+    }
+    namespace["__slots__"] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+def intern_keys(keys: Iterable[str]) -> FrozenSet[str]:
+    return frozenset(map(sys.intern, keys))
+
+
+@slotted
 @dataclasses.dataclass
 class Task:
+    """
+    Keys are interned and dependencies stored as a frozenset of keys, so
+    large numbers of tasks share their key strings.
+    """
+
     key: str
     message: str
     category: Category = Category.DEFAULT
     value: Value = Value.DEFAULT
     effort: Effort = Effort.DEFAULT
-    dependencies: Set[str] = dataclasses.field(default_factory=set)
+    dependencies: AbstractSet[str] = frozenset()
     done: Optional[date] = None
 
+    def __post_init__(self) -> None:
+        self.key = sys.intern(self.key)
+        self.dependencies = intern_keys(self.dependencies)
+
     @property
     def effort_points(self) -> int:
         return POINTS[self.effort.name]
@@ -70,10 +103,7 @@ class Task:
     def add_dependency(self, dependency: Task):
         if self.key == dependency.key or self.key in dependency.dependencies:
             raise TaskError("circular dependencies")
-        self.dependencies.add(dependency.key)
+        self.dependencies = self.dependencies | {sys.intern(dependency.key)}
 
     def remove_dependency(self, dependency: Task):
-        try:
-            self.dependencies.remove(dependency.key)
-        except KeyError:
-            pass
+        self.dependencies = self.dependencies - {dependency.key}